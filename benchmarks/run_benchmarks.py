@@ -0,0 +1,144 @@
+"""Times the physics and render stages separately on seeded scenarios.
+
+    python -m benchmarks.run_benchmarks --output results.json --baseline benchmarks/baseline.json
+
+Every stage is timed in isolation on identical seeded bodies. Results are JSON; with --baseline
+the run exits non-zero when any stage's median is slower than the baseline by more than
+--tolerance. --save-baseline overwrites the baseline with this run.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from statistics import median
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from grav_sim.src.config.settings import BoardConfig, PhysicsConfig, WindowConfig
+from grav_sim.src.core.physics.direct import direct_accelerations
+from grav_sim.src.core.physics.physics import PhysicsEngine
+from grav_sim.src.core.physics.tree import FlatQuadTree
+from grav_sim.src.core.scenarios import orbiting_disk
+from grav_sim.src.graphics.camera import Camera
+from grav_sim.src.graphics.renderer import Renderer
+
+SIZES = (100, 1000, 10000, 100000)
+# Direct summation is O(N^2); above this it only measures how long we are willing to wait
+DIRECT_MAX_BODIES = 10000
+STAGES = ("tree_build", "gravity_tree", "gravity_direct", "collisions", "render")
+
+
+def time_stage(run: Callable[[], object], repeats: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    samples = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {"median": median(samples), "min": min(samples), "repeats": repeats}
+
+
+def benchmark_size(count: int, seed: int, repeats: int, stages: List[str]) -> Dict[str, Dict]:
+    engine = PhysicsEngine([], solver="tree")
+    # The same star and disk of orbiting bodies as RANDOM_GRAVITY
+    engine.replace_particles(orbiting_disk(count, seed))
+    particles = engine.particles
+    results = {}
+
+    if "tree_build" in stages:
+        results["tree_build"] = time_stage(lambda: FlatQuadTree.build(particles.positions, particles.masses), repeats)
+    if "gravity_tree" in stages:
+        results["gravity_tree"] = time_stage(engine.calculate_accelerations, repeats)
+    if "gravity_direct" in stages and count <= DIRECT_MAX_BODIES:
+        results["gravity_direct"] = time_stage(
+            lambda: direct_accelerations(particles.positions, particles.masses, PhysicsConfig.GRAVITY_CONSTANT), repeats)
+    if "collisions" in stages:
+        # One frame of motion so the swept test has segments to check; the neighbour list starts cold
+        dt = PhysicsConfig.DEFAULT_TIME_SCALE
+        particles.old_positions[:] = particles.positions - particles.velocities * dt
+        results["collisions"] = time_stage(engine.get_colliding_pairs, repeats, setup=engine.neighbours.invalidate)
+    if "render" in stages:
+        canvas = pygame.Surface((WindowConfig.WIDTH, WindowConfig.HEIGHT))
+        camera = Camera(entity_to_track=None)
+        camera.zoom_level = WindowConfig.WIDTH / BoardConfig.WIDTH
+        renderer = Renderer(camera=camera)
+        results["render"] = time_stage(lambda: renderer.draw(canvas, [], None, 1.0, particles), repeats)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for stage, sizes in results["results"].items():
+        for size, timing in sizes.items():
+            reference = baseline.get("results", {}).get(stage, {}).get(size)
+            if reference is None:
+                continue
+            ratio = timing["median"] / reference["median"]
+            timing["baseline_ratio"] = ratio
+            if ratio > 1 + tolerance:
+                regressions.append(f"{stage} N={size}: {timing['median'] * 1e3:.2f} ms vs "
+                                   f"{reference['median'] * 1e3:.2f} ms baseline ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the physics and render stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    pygame.font.init()
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+        },
+        "results": {stage: {} for stage in args.stages},
+    }
+    for count in args.sizes:
+        for stage, timing in benchmark_size(count, args.seed, args.repeats, args.stages).items():
+            results["results"][stage][str(count)] = timing
+            print(f"{stage:>15} N={count:<7} {timing['median'] * 1e3:10.3f} ms", file=sys.stderr)
+
+    regressions = []
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,75 @@ class CameraConfig:
 class RendererConfig:
     VELOCITY_SCALE = 100
     BASE_ARROW_LENGTH = 20
+    # Bodies up to this screen radius are blitted from cached sprites; larger ones are drawn directly
+    SPRITE_MAX_RADIUS = 64
+    SPRITE_CACHE_SIZE = 2048
+    # Cull through the spatial index only when the view covers less than this share of the bodies' extent
+    INDEX_MAX_COVERAGE = 0.25
+    # Outline each body's previous position and swept collision path
+    SHOW_SWEPT_PATHS = False
+    # Below this zoom, crowded views are drawn as a tone-mapped mass density image instead of bodies
+    DENSITY_MAP_ZOOM = 0.002
+    DENSITY_MAP_MIN_BODIES = 1000
+    # Screen pixels per density cell; larger cells bin faster and are scaled up when drawn
+    DENSITY_MAP_CELL = 1
+    # Brightness given to a cell holding a single typical body, so isolated bodies stay visible
+    DENSITY_MAP_FLOOR = 0.3
+    # Cells at or above this percentile of mass are drawn at full brightness
+    DENSITY_MAP_PERCENTILE = 99.0
+
+
+class DiagnosticsConfig:
+    # Steps between conservation samples; 0 leaves the monitor off
+    INTERVAL = 0
+    HISTORY = 1000
+
+
+class RecordingConfig:
+    CHUNK_FRAMES = 256
+    QUEUE_FRAMES = 64
+    PRECISION = "float32"
+    ALIGNMENT = 4096
+    # Slots reserved per id seen at the start, so bodies added later still fit
+    SLOT_HEADROOM = 2.0
+
+
+class CheckpointConfig:
+    ALIGNMENT = 64
+    # Where the save and load keys write and read
+    PATH = "quicksave.gsc"
+
+
+class ProfilerConfig:
+    ENABLED = True
+    HISTORY = 240
+    HUD_VISIBLE = False
+    WARNING_INTERVAL = 5.0
+    EXPORT_PATH = "profile.json"
+
+
+class SimulationConfig:
+    # Step physics on a background thread; off runs it inline with rendering as before
+    THREADED = True
+    TARGET_FPS = 60
+    # Fixed steps per wall-clock second at time scale 1; the time scale multiplies the rate, never the step
+    STEPS_PER_SECOND = 60
+    MAX_STEPS_PER_SECOND = 1200
+    # Share of a frame inline physics may use; a background thread gets the whole frame
+    PHYSICS_BUDGET = 0.6
+    COST_SMOOTHING = 0.2
+
+
+class MouseConfig:
+    # How far from a body's edge, in screen pixels, a right click still selects it
+    PICK_RADIUS = 10
+
+
+class ScenarioConfig:
+    DEFAULT = "SOLAR_SYSTEM"
+    # Seed used when none is given, so loading a scenario twice gives the same bodies
+    SEED = 0
+    DENSITY = 0.141
 
 
 class BoardConfig:
@@ -26,6 +95,39 @@ class PhysicsConfig:
     DEFAULT_TIME_SCALE = 1.0
     MAX_TIME_SCALE = 10.0
     MIN_TIME_SCALE = 0.1
+    # Any registered solver: "direct", "tree", "incremental_tree", or "auto" to measure the candidates and pick
+    FORCE_SOLVER = "auto"
+    # incremental_tree is left out: refitting it costs as much as rebuilding "tree" from scratch
+    AUTO_SOLVER_CANDIDATES = ("direct", "tree")
+    # Evaluations timed per candidate; the fastest counts, so one-off costs of a first call are not held against it
+    AUTO_SOLVER_TRIALS = 2
+    # Direct summation is taken without measuring up to the first count and never tried above the second
+    AUTO_SOLVER_DIRECT_BELOW = 64
+    AUTO_SOLVER_DIRECT_ABOVE = 8000
+    # Above this many bodies a single evaluation is too slow to repeat per candidate; the first candidate left is used
+    AUTO_SOLVER_MEASURE_ABOVE = 50000
+    # Measure again once the body count leaves this factor of the count last measured at
+    AUTO_SOLVER_RESELECT = 0.75
+    INTEGRATOR = "leapfrog"
+    SUBSTEPS = 1
+    # Simulated time covered by one fixed step
+    TIMESTEP = 1.0
+    BLOCK_TIMESTEP_ETA = 0.05
+    BLOCK_TIMESTEP_MAX_LEVEL = 10
+    SOFTENING = 1.0
+    DIRECT_TILE_ELEMENTS = 1 << 16
+    THETA = 0.5
+    TREE_LEAF_CAPACITY = 8
+    TREE_MAX_DEPTH = 21
+    TREE_BATCH_ELEMENTS = 1 << 18
+    PARALLEL_MIN_BODIES = 2000
+    SHARED_MEMORY_HEADROOM = 1.5
+
+
+class CollisionConfig:
+    SKIN_FACTOR = 10.0
+    MIN_SKIN = 1.0
+    BATCH_ELEMENTS = 1 << 18
 
 
 class EntityConfig:
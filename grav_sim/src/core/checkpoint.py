@@ -0,0 +1,148 @@
+import json
+import os
+import random
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import CheckpointConfig
+from grav_sim.src.core.physics.particles import ParticleStore
+from grav_sim.src.core.physics.physics import PhysicsEngine
+from grav_sim.src.core.physics.workers import WorkerPool
+
+MAGIC = b"GRAVCKPT"
+VERSION = 1
+# magic, version, header length
+PREAMBLE = struct.Struct("<8sII")
+PARTICLE_FIELDS = ("positions", "old_positions", "velocities", "masses", "densities", "colors", "ids")
+
+
+def save_checkpoint(path: str, engine: PhysicsEngine, time_scale: Optional[float] = None,
+                    camera=None, extra: Optional[Dict] = None) -> str:
+    """Writes the full engine state to ``path`` atomically and returns the path.
+
+    Arrays are stored raw and aligned so load_checkpoint reads each one straight into place.
+    """
+    particles = engine.particles
+    arrays = {name: np.ascontiguousarray(getattr(particles, name)) for name in PARTICLE_FIELDS}
+    cached = engine.cached_accelerations()
+    if cached is not None:
+        arrays["engine_accelerations"] = np.ascontiguousarray(cached)
+    for name, array in engine.integrator.state(engine).items():
+        arrays[f"integrator_{name}"] = np.ascontiguousarray(array)
+    for name, array in engine.solver.state().items():
+        arrays[f"solver_{name}"] = np.ascontiguousarray(array)
+
+    python_rng = random.getstate()
+    numpy_rng = np.random.get_state()
+    arrays["numpy_rng_keys"] = numpy_rng[1]
+
+    state = {
+        "solver": engine.solver.name,
+        "integrator": engine.integrator.name,
+        "substeps": engine.substeps,
+        "steps": engine.steps,
+        "time": engine.time,
+        "force_evaluations": engine.force_evaluations,
+        "next_id": particles.next_id,
+        "names": {str(particle_id): name for particle_id, name in particles.names.items()},
+        "diagnostics_interval": engine.diagnostics.interval if engine.diagnostics is not None else 0,
+        "diagnostics_reference": engine.diagnostics.reference if engine.diagnostics is not None else None,
+        "python_rng": [python_rng[0], list(python_rng[1]), python_rng[2]],
+        "numpy_rng": [numpy_rng[0], int(numpy_rng[2]), int(numpy_rng[3]), float(numpy_rng[4])],
+        "time_scale": time_scale,
+        "camera": None if camera is None else {
+            "position": [camera.position.x, camera.position.y],
+            "zoom": camera.zoom_level,
+            "tracking": camera.entity_to_track.name if camera.entity_to_track is not None else None,
+        },
+        "extra": extra or {},
+    }
+
+    # The header records every array's offset and the offsets depend on the header's length; iterate until stable
+    layout = {}
+    header = b""
+    while True:
+        offset = _align(PREAMBLE.size + len(header))
+        for name, array in arrays.items():
+            layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps({"state": state, "arrays": layout}).encode()
+        stable = len(encoded) == len(header)
+        # Same length is not the same bytes: the offsets inside may differ, so always keep the latest encoding
+        header = encoded
+        if stable:
+            break
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(layout[name]["offset"])
+            file.write(array.tobytes())
+    # Replacing in one step means a crash mid-save leaves the previous checkpoint intact
+    os.replace(temporary, path)
+    return path
+
+
+def load_checkpoint(path: str, pool: Optional[WorkerPool] = None, camera=None) -> Tuple[PhysicsEngine, Dict]:
+    """Rebuilds an engine from ``path``; returns it with the saved state dict (time scale, camera, extra).
+
+    Arrays are read into memory rather than mapped: a quicksave overwrites the file it was loaded from, which
+    fails on platforms that refuse to replace a mapped file. Restores the global random generators and, if
+    given, the camera.
+    """
+    with open(path, "rb") as file:
+        magic, version, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint")
+        if version != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}")
+        header = json.loads(file.read(header_length))
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            file.seek(spec["offset"])
+            arrays[name] = np.fromfile(file, dtype=spec["dtype"], count=int(np.prod(shape))).reshape(shape)
+    state = header["state"]
+
+    engine = PhysicsEngine([], solver=state["solver"], pool=pool, integrator=state["integrator"],
+                           substeps=state["substeps"], diagnostics_interval=state["diagnostics_interval"])
+    names = {int(particle_id): name for particle_id, name in state["names"].items()}
+    engine.replace_particles(ParticleStore.from_arrays(
+        arrays["ids"], arrays["positions"], arrays["velocities"], arrays["masses"], arrays["densities"],
+        arrays["colors"], names, old_positions=arrays["old_positions"], next_id=state["next_id"]))
+    engine.steps = state["steps"]
+    engine.time = state["time"]
+    engine.force_evaluations = state["force_evaluations"]
+    if engine.diagnostics is not None:
+        engine.diagnostics.reference = state["diagnostics_reference"]
+    if "engine_accelerations" in arrays:
+        engine.prime_accelerations(arrays["engine_accelerations"])
+    engine.integrator.restore(engine, _prefixed(arrays, "integrator_"))
+    solver_state = _prefixed(arrays, "solver_")
+    if solver_state:
+        engine.solver.restore(solver_state)
+
+    version, keys, python_gauss = state["python_rng"]
+    random.setstate((version, tuple(keys), python_gauss))
+    algorithm, position, has_gauss, cached_gaussian = state["numpy_rng"]
+    np.random.set_state((algorithm, np.asarray(arrays["numpy_rng_keys"]), position, has_gauss, cached_gaussian))
+
+    if camera is not None and state["camera"] is not None:
+        camera.position.x, camera.position.y = state["camera"]["position"]
+        camera.zoom_level = state["camera"]["zoom"]
+        camera.entity_to_track = engine.entities.get(state["camera"]["tracking"])
+    return engine, state
+
+
+def _prefixed(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+
+def _align(offset: int) -> int:
+    alignment = CheckpointConfig.ALIGNMENT
+    return -(-offset // alignment) * alignment
@@ -1,8 +1,6 @@
-from copy import deepcopy
-from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Dict
+from typing import Dict
 
-from pygame import Rect, Vector2
+from pygame import Rect
 from pygame.math import Vector2
 import pygame
 import math
@@ -10,32 +8,145 @@ import random
 import string
 
 
-@dataclass(eq=False)
-class Entity(pygame.sprite.Sprite):
-    position: Vector2
-    old_position: Vector2
-    density: float
-    mass: float
-    velocity: float = 0
-    direction: float = 0
-    color: tuple = (255, 0, 0)
-    draw_velocity: bool = False
-    name: str = field(default_factory=lambda: ''.join(random.choices(string.ascii_letters + string.digits, k=8)))
+class Entity:
+    """One body: either standalone, or a view of its row in a particle store once bound.
+
+    Slotted, so a view costs a few machine words rather than a dict. Radius and the rects built
+    from it are cached and rebuilt only when the mass, density or position they came from change.
+    """
+
+    __slots__ = ("store", "id", "_position", "_old_position", "_density", "_mass", "_velocity", "_direction",
+                 "_color", "name", "draw_velocity", "_radius", "_rect", "_old_rect", "_path")
 
     def __init__(self, position: Vector2, density: float, mass: float,
                  velocity: float = 0, direction: float = 0,
                  color: tuple = (255, 0, 0), name: str = None, draw_velocity: bool = False):
-        super().__init__()
-        self.position = position
-        self.old_position = position
-        self.density = density
-        self.mass = mass
-        self.velocity = velocity
-        self.direction = direction
-        self.color = color
+        self.store = None
+        self.id = None
+        self._position = position
+        self._old_position = position
+        self._density = density
+        self._mass = mass
+        self._velocity = velocity
+        self._direction = direction
+        self._color = color
         self.name = name if name is not None else ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-        self.image = None
         self.draw_velocity = draw_velocity
+        self._clear_geometry()
+
+    def _clear_geometry(self) -> None:
+        # Each cache is (inputs, value); the value is reused while the inputs compare equal
+        self._radius = None
+        self._rect = None
+        self._old_rect = None
+        self._path = None
+
+    def bind(self, store, particle_id: int) -> None:
+        # From here on the entity is a view of its row in the particle store
+        self.store = store
+        self.id = particle_id
+
+    @property
+    def bound(self) -> bool:
+        return self.store is not None and self.store.index_of(self.id) >= 0
+
+    @property
+    def _index(self) -> int:
+        return self.store.index_of(self.id)
+
+    @property
+    def position(self) -> Vector2:
+        if self.store is None:
+            return self._position
+        return Vector2(*self.store.positions[self._index])
+
+    @position.setter
+    def position(self, value: Vector2) -> None:
+        if self.store is None:
+            self._position = value
+        else:
+            self.store.positions[self._index] = (value[0], value[1])
+
+    @property
+    def old_position(self) -> Vector2:
+        if self.store is None:
+            return self._old_position
+        return Vector2(*self.store.old_positions[self._index])
+
+    @old_position.setter
+    def old_position(self, value: Vector2) -> None:
+        if self.store is None:
+            self._old_position = value
+        else:
+            self.store.old_positions[self._index] = (value[0], value[1])
+
+    @property
+    def mass(self) -> float:
+        if self.store is None:
+            return self._mass
+        return float(self.store.masses[self._index])
+
+    @mass.setter
+    def mass(self, value: float) -> None:
+        if self.store is None:
+            self._mass = value
+        else:
+            self.store.masses[self._index] = value
+
+    @property
+    def density(self) -> float:
+        if self.store is None:
+            return self._density
+        return float(self.store.densities[self._index])
+
+    @density.setter
+    def density(self, value: float) -> None:
+        if self.store is None:
+            self._density = value
+        else:
+            self.store.densities[self._index] = value
+
+    @property
+    def color(self) -> tuple:
+        if self.store is None:
+            return self._color
+        return tuple(self.store.colors[self._index].tolist())
+
+    @color.setter
+    def color(self, value: tuple) -> None:
+        if self.store is None:
+            self._color = value
+        else:
+            self.store.colors[self._index] = value
+
+    @property
+    def velocity(self) -> float:
+        if self.store is None:
+            return self._velocity
+        return math.hypot(*self.store.velocities[self._index])
+
+    @velocity.setter
+    def velocity(self, value: float) -> None:
+        if self.store is None:
+            self._velocity = value
+        else:
+            direction = self.direction
+            self.store.velocities[self._index] = (math.cos(direction) * value, math.sin(direction) * value)
+
+    @property
+    def direction(self) -> float:
+        if self.store is None:
+            return self._direction
+        vx, vy = self.store.velocities[self._index]
+        return math.atan2(vy, vx)
+
+    @direction.setter
+    def direction(self, value: float) -> None:
+        if self.store is None:
+            self._direction = value
+        else:
+            speed = self.velocity
+            self.store.velocities[self._index] = (math.cos(value) * speed, math.sin(value) * speed)
 
     def __getstate__(self) -> Dict:
         state = {
@@ -52,19 +163,19 @@ class Entity(pygame.sprite.Sprite):
         return state
 
     def __setstate__(self, state: Dict) -> None:
-        pygame.sprite.Sprite.__init__(self)
+        self.store = None
+        self.id = None
+        self._position = Vector2(*state['position'])
+        self._old_position = Vector2(*state['old_position'])
 
-        self.position = Vector2(*state['position'])
-        self.old_position = Vector2(*state['old_position'])
-
-        self.density = state['density']
-        self.mass = state['mass']
-        self.velocity = state['velocity']
-        self.direction = state['direction']
-        self.color = state['color']
+        self._density = state['density']
+        self._mass = state['mass']
+        self._velocity = state['velocity']
+        self._direction = state['direction']
+        self._color = state['color']
         self.draw_velocity = state['draw_velocity']
         self.name = state['name']
-        self.image = None
+        self._clear_geometry()
 
     def __str__(self):
         return f"Entity '{self.name}'\n" \
@@ -75,71 +186,68 @@ class Entity(pygame.sprite.Sprite):
 
     @property
     def radius(self) -> float:
-        return math.sqrt(self.mass / (self.density * math.pi))
+        if self.store is None:
+            mass, density = self._mass, self._density
+        else:
+            index = self._index
+            mass, density = self.store.masses.item(index), self.store.densities.item(index)
+        cached = self._radius
+        if cached is None or cached[0] != (mass, density):
+            cached = self._radius = ((mass, density), math.sqrt(mass / (density * math.pi)))
+        return cached[1]
 
     @property
     def realRect(self) -> Rect:
-        return pygame.Rect(
-            self.position.x - self.radius,
-            self.position.y - self.radius,
-            self.radius * 2,
-            self.radius * 2
-        )
+        """Bounding rect at the current position; shared between calls, so copy it before changing it."""
+        position = self.position
+        key = (position.x, position.y, self.radius)
+        if self._rect is None or self._rect[0] != key:
+            self._rect = (key, self._bounds(*key))
+        return self._rect[1]
 
     @property
     def oldRect(self) -> Rect:
-        return pygame.Rect(
-            self.old_position.x - self.radius,
-            self.old_position.y - self.radius,
-            self.radius * 2,
-            self.radius * 2
-        )
+        position = self.old_position
+        key = (position.x, position.y, self.radius)
+        if self._old_rect is None or self._old_rect[0] != key:
+            self._old_rect = (key, self._bounds(*key))
+        return self._old_rect[1]
+
+    @staticmethod
+    def _bounds(x: float, y: float, radius: float) -> Rect:
+        return pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
 
     @property
     def collision_path(self) -> list[Vector2]:
-        displacement = self.position - self.old_position
+        old_position, position, radius = self.old_position, self.position, self.radius
+        key = (old_position.x, old_position.y, position.x, position.y, radius)
+        if self._path is not None and self._path[0] == key:
+            return self._path[1]
+
+        displacement = position - old_position
         length = max(displacement.length(), 0.001)
         direction = displacement / length
 
         perp_direction = Vector2(-direction.y, direction.x)
-        perp_direction *= self.radius * 2
-
-        start_offset = self.old_position + perp_direction
-        end_offset = self.position + perp_direction
-        start_neg_offset = self.old_position - perp_direction
-        end_neg_offset = self.position - perp_direction
-
-        return [start_offset, end_offset, end_neg_offset, start_neg_offset]
-
-    @property
-    def collision_mask(self) -> pygame.Surface:
-        # Create a surface to draw the collision mask
-        mask_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-
-        # Draw a circle for the current position (centered at self.position)
-        pygame.draw.circle(mask_surface, self.color,
-                           (self.position.x - self.position.x + self.radius,
-                            self.position.y - self.position.y + self.radius),
-                           self.radius)
-
-        # Draw a circle for the old position (centered at self.old_position)
-        pygame.draw.circle(mask_surface, self.color,
-                           (self.old_position.x - self.old_position.x + self.radius,
-                            self.old_position.y - self.old_position.y + self.radius),
-                           self.radius)
+        perp_direction *= radius * 2
 
-        # Draw the path of movement (collision path) as an outline
-        path_points = self.collision_path
-        pygame.draw.polygon(mask_surface, self.color, path_points, 1)
+        start_offset = old_position + perp_direction
+        end_offset = position + perp_direction
+        start_neg_offset = old_position - perp_direction
+        end_neg_offset = position - perp_direction
 
-        return mask_surface
+        path = [start_offset, end_offset, end_neg_offset, start_neg_offset]
+        self._path = (key, path)
+        return path
 
     def move(self, x: float, y: float) -> None:
-        self.old_position = deepcopy(self.position)
-        self.position.x = x
-        self.position.y = y
+        # A bound position is read fresh from the store, and an unbound one is replaced, never changed in place
+        self.old_position = self.position
+        self.position = Vector2(x, y)
 
     def get_velocity_vector(self) -> Vector2:
+        if self.store is not None:
+            return Vector2(*self.store.velocities[self._index])
         return Vector2(
             math.cos(self.direction) * self.velocity,
             math.sin(self.direction) * self.velocity
@@ -0,0 +1,80 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pygame.math import Vector2
+
+from grav_sim.src.config.settings import EntityConfig
+from grav_sim.src.core.entity.entity import Entity
+
+
+class EntityMap(Mapping):
+    """Name -> Entity over every body in a store, creating each view the first time it is looked up.
+
+    Nothing is built per body up front, so a store of millions costs nothing until someone asks
+    for a particular body. ``views`` is the id -> Entity cache and may be shared between maps.
+    """
+
+    def __init__(self, store, views: Optional[Dict[int, Entity]] = None):
+        self.store = store
+        self.views = views if views is not None else {}
+
+    def __getitem__(self, name: str) -> Entity:
+        particle_id = self._live_id(name)
+        if particle_id is None:
+            raise KeyError(name)
+        return self.view(particle_id)
+
+    def __contains__(self, name) -> bool:
+        return self._live_id(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.store.name_of(particle_id) for particle_id in self.store.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def view(self, particle_id: int) -> Entity:
+        entity = self.views.get(particle_id)
+        if entity is None:
+            entity = Entity(Vector2(0, 0), EntityConfig.DEFAULT_DENSITY, 0.0, name=self.store.name_of(particle_id))
+            self.views[particle_id] = entity
+        if entity.store is not self.store:
+            entity.bind(self.store, particle_id)
+        return entity
+
+    def add(self, entity: Entity) -> None:
+        """Makes a bound entity the view of its own row, so lookups return that same object."""
+        self.views[entity.id] = entity
+
+    def existing(self) -> List[Entity]:
+        """Views already created for live bodies; only these can carry per-view state such as ``draw_velocity``."""
+        return [self.view(particle_id) for particle_id in list(self.views) if self.store.index_of(particle_id) >= 0]
+
+    def discard(self, particle_ids: Iterable[int]) -> None:
+        for particle_id in particle_ids:
+            self.views.pop(particle_id, None)
+
+    def _live_id(self, name) -> Optional[int]:
+        if not isinstance(name, str):
+            return None
+        particle_id = self.store.id_of(name)
+        if particle_id is None or self.store.index_of(particle_id) < 0:
+            return None
+        return particle_id
+
+
+class EntityViews:
+    """Keeps one Entity per particle id and rebinds it to each new store.
+
+    Views that outlive a store keep their identity, so a tracked body stays tracked across snapshots.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, Entity] = {}
+
+    def bind(self, store) -> EntityMap:
+        if len(self._by_id) > 2 * len(store) + 64:
+            # Merged bodies never come back; drop their views once they dominate the cache
+            self._by_id = {particle_id: entity for particle_id, entity in self._by_id.items()
+                           if store.index_of(particle_id) >= 0}
+        return EntityMap(store, self._by_id)
@@ -0,0 +1,97 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import CollisionConfig
+from grav_sim.src.core.physics.tree import batch_ranges, expand_ranges
+
+
+def sweep_and_prune(centers: np.ndarray, reach: np.ndarray,
+                    batch_elements: int = CollisionConfig.BATCH_ELEMENTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (first < second) whose circles of radius ``reach`` around ``centers`` overlap."""
+    count = len(reach)
+    if count < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Sweep along the axis with the larger extent, which keeps the candidate runs shorter
+    axis = int(np.argmax(np.ptp(centers, axis=0)))
+    lower = centers[:, axis] - reach
+    order = np.argsort(lower, kind='stable')
+    sorted_lower = lower[order]
+    sorted_upper = (centers[:, axis] + reach)[order]
+
+    run_ends = np.searchsorted(sorted_lower, sorted_upper, side='right')
+    run_starts = np.arange(1, count + 1)
+    run_counts = np.maximum(run_ends - run_starts, 0)
+
+    first, second = [], []
+    for start, stop in batch_ranges(run_counts, batch_elements):
+        sizes = run_counts[start:stop]
+        left = np.repeat(np.arange(start, stop), sizes)
+        right = expand_ranges(run_starts[start:stop], sizes)
+        left, right = order[left], order[right]
+
+        delta = centers[left] - centers[right]
+        limit = reach[left] + reach[right]
+        close = np.einsum('ij,ij->i', delta, delta) <= limit * limit
+        left, right = left[close], right[close]
+        first.append(np.minimum(left, right))
+        second.append(np.maximum(left, right))
+
+    if not first:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(first), np.concatenate(second)
+
+
+class NeighbourList:
+    """Verlet list of collision candidates, reused until some body has moved more than half its skin
+    from where the list was built.
+
+    Each body's skin is ``skin_factor`` times its own step, so a few fast bodies do not widen the
+    search around every slow one.
+    """
+
+    def __init__(self, skin_factor: float = CollisionConfig.SKIN_FACTOR,
+                 min_skin: float = CollisionConfig.MIN_SKIN):
+        self.skin_factor = skin_factor
+        self.min_skin = min_skin
+        self.skins = np.zeros(0)
+        self.first = np.zeros(0, dtype=np.int64)
+        self.second = np.zeros(0, dtype=np.int64)
+        self.reference_positions: Optional[np.ndarray] = None
+        self.reference_radii: Optional[np.ndarray] = None
+        self.reference_ids: Optional[np.ndarray] = None
+        self.rebuilds = 0
+
+    def candidates(self, old_positions: np.ndarray, positions: np.ndarray, radii: np.ndarray,
+                   ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self._stale(old_positions, positions, radii, ids):
+            self._rebuild(old_positions, positions, radii, ids)
+        return self.first, self.second
+
+    def invalidate(self) -> None:
+        self.reference_ids = None
+
+    def _stale(self, old_positions: np.ndarray, positions: np.ndarray, radii: np.ndarray, ids: np.ndarray) -> bool:
+        if self.reference_ids is None or not np.array_equal(self.reference_ids, ids):
+            return True
+        if (radii > self.reference_radii).any():
+            return True
+        # The whole step, start to end, must stay within half of each body's skin of its reference position
+        limit = (self.skins / 2) ** 2
+        for sample in (old_positions, positions):
+            drift = sample - self.reference_positions
+            if (np.einsum('ij,ij->i', drift, drift) > limit).any():
+                return True
+        return False
+
+    def _rebuild(self, old_positions: np.ndarray, positions: np.ndarray, radii: np.ndarray, ids: np.ndarray) -> None:
+        step = positions - old_positions
+        self.skins = np.maximum(self.min_skin, self.skin_factor * np.sqrt(np.einsum('ij,ij->i', step, step)))
+
+        # Build around the middle of the current step; both ends are within half a step of it
+        self.reference_positions = (old_positions + positions) / 2
+        self.reference_radii = radii.copy()
+        self.reference_ids = ids.copy()
+        self.first, self.second = sweep_and_prune(self.reference_positions, radii + self.skins / 2)
+        self.rebuilds += 1
@@ -0,0 +1,76 @@
+from typing import Tuple
+
+import numpy as np
+
+from grav_sim.src.core.physics.particles import ParticleStore
+
+
+def closest_approach(old_positions: np.ndarray, positions: np.ndarray,
+                     first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Time in [0, 1] and squared distance of closest approach for each pair over one step.
+
+    Both bodies are taken to move linearly from ``old_positions`` to ``positions``.
+    """
+    start = old_positions[first] - old_positions[second]
+    motion = (positions[first] - old_positions[first]) - (positions[second] - old_positions[second])
+
+    motion_sq = np.einsum('ij,ij->i', motion, motion)
+    projection = -np.einsum('ij,ij->i', start, motion)
+    times = np.divide(projection, motion_sq, out=np.zeros_like(projection), where=motion_sq > 0)
+    np.clip(times, 0.0, 1.0, out=times)
+
+    closest = start + motion * times[:, None]
+    return times, np.einsum('ij,ij->i', closest, closest)
+
+
+def swept_circle_hits(old_positions: np.ndarray, positions: np.ndarray, radii: np.ndarray,
+                      first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    _, distance_sq = closest_approach(old_positions, positions, first, second)
+    reach = radii[first] + radii[second]
+    return distance_sq <= reach * reach
+
+
+def connected_components(count: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Array-based union-find: every body is labelled with the smallest index in its cluster."""
+    parent = np.arange(count)
+    while True:
+        root_first, root_second = parent[first], parent[second]
+        split = root_first != root_second
+        if not split.any():
+            return parent
+        # Union: hook the larger root under the smaller one
+        np.minimum.at(parent, np.maximum(root_first, root_second)[split], np.minimum(root_first, root_second)[split])
+        # Find with full path compression by pointer jumping
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def merge_clusters(particles: ParticleStore, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Merges every cluster of touching bodies into its most massive member in one pass.
+
+    Mass and momentum are summed and the survivor moves to the cluster's centre of mass.
+    Returns the keep mask for ParticleStore.compact; absorbed slots are left for the caller to drop.
+    """
+    count = len(particles)
+    labels = connected_components(count, first, second)
+    masses = particles.masses
+
+    # Survivor of each cluster is its heaviest member; ties go to the lowest index
+    order = np.lexsort((np.arange(count), -masses, labels))
+    leaders = np.concatenate([[True], labels[order][1:] != labels[order][:-1]])
+    survivors = np.empty(count, dtype=np.int64)
+    survivors[labels[order][leaders]] = order[leaders]
+    survivor_of = survivors[labels]
+
+    total_mass = np.bincount(survivor_of, masses, minlength=count)
+    merged = np.flatnonzero(np.bincount(survivor_of, minlength=count) > 1)
+    weights = total_mass[merged, None]
+    for array in (particles.positions, particles.old_positions, particles.velocities):
+        summed = np.column_stack([np.bincount(survivor_of, masses * array[:, axis], minlength=count) for axis in (0, 1)])
+        array[merged] = summed[merged] / weights
+    particles.masses[merged] = total_mass[merged]
+
+    return survivor_of == np.arange(count)
@@ -0,0 +1,79 @@
+from typing import Optional
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+
+
+def direct_accelerations(positions: np.ndarray, masses: np.ndarray, G: float,
+                         softening: float = PhysicsConfig.SOFTENING,
+                         tile_elements: int = PhysicsConfig.DIRECT_TILE_ELEMENTS,
+                         targets: Optional[np.ndarray] = None, return_nearest: bool = False,
+                         potentials: Optional[np.ndarray] = None):
+    """Accelerations of ``targets`` (all bodies by default) from every body.
+
+    With ``return_nearest`` also returns each target's squared distance to its nearest other body.
+    ``potentials``, if given, is filled with each target's softened specific potential in the same pass.
+    """
+    count = len(masses)
+    if targets is None:
+        targets = np.arange(count)
+    accelerations = np.zeros((len(targets), 2), dtype=np.float64)
+    nearest = np.full(len(targets), np.inf) if return_nearest else None
+    if count == 0 or len(targets) == 0:
+        return (accelerations, nearest) if return_nearest else accelerations
+
+    softening_sq = softening * softening
+    # Rows per tile keep each (tile x N) block around tile_elements doubles, so memory is O(N * tile)
+    tile = max(1, tile_elements // count)
+
+    for start in range(0, len(targets), tile):
+        stop = min(start + tile, len(targets))
+        rows_targets = targets[start:stop]
+        dx = positions[:, 0] - positions[rows_targets, 0, None]
+        dy = positions[:, 1] - positions[rows_targets, 1, None]
+
+        weights = dx * dx + dy * dy
+        rows = np.arange(stop - start)
+        if return_nearest:
+            weights[rows, rows_targets] = np.inf
+            nearest[start:stop] = weights.min(axis=1)
+        weights += softening_sq
+        # Mask self-interaction so an unsoftened kernel never divides by zero
+        weights[rows, rows_targets] = 1.0
+        if potentials is not None:
+            distances = np.sqrt(weights)
+            distances[rows, rows_targets] = np.inf
+            potentials[start:stop] = -(masses / distances).sum(axis=1)
+        np.power(weights, -1.5, out=weights)
+        weights[rows, rows_targets] = 0.0
+        weights *= masses
+
+        accelerations[start:stop, 0] = np.einsum('ij,ij->i', weights, dx)
+        accelerations[start:stop, 1] = np.einsum('ij,ij->i', weights, dy)
+
+    accelerations *= G
+    if potentials is not None:
+        potentials *= G
+    return (accelerations, nearest) if return_nearest else accelerations
+
+
+def direct_potentials(positions: np.ndarray, masses: np.ndarray, G: float,
+                      softening: float = PhysicsConfig.SOFTENING,
+                      tile_elements: int = PhysicsConfig.DIRECT_TILE_ELEMENTS) -> np.ndarray:
+    """Softened specific potential of every body, tiled the same way as direct_accelerations."""
+    count = len(masses)
+    potentials = np.zeros(count, dtype=np.float64)
+    softening_sq = softening * softening
+    tile = max(1, tile_elements // max(count, 1))
+
+    for start in range(0, count, tile):
+        stop = min(start + tile, count)
+        dx = positions[:, 0] - positions[start:stop, 0, None]
+        dy = positions[:, 1] - positions[start:stop, 1, None]
+        weights = dx * dx + dy * dy + softening_sq
+        rows = np.arange(stop - start)
+        weights[rows, rows + start] = np.inf
+        potentials[start:stop] = -(masses / np.sqrt(weights)).sum(axis=1)
+
+    return potentials * G
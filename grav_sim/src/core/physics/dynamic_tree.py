@@ -0,0 +1,279 @@
+from typing import Dict, List, Set
+
+import numpy as np
+
+from grav_sim.src.config.settings import BoardConfig, PhysicsConfig
+from grav_sim.src.core.physics.tree import FlatQuadTree, morton_keys
+
+
+class DynamicQuadTree:
+    """Quadtree that persists between frames and is refitted instead of rebuilt.
+
+    Only bodies that left their leaf cell are moved; leaves split above ``capacity`` bodies and
+    subtrees collapse back into a single leaf at ``merge_threshold`` or fewer. The root grows
+    whenever a body leaves its bounds. ``refit`` exports the current structure as a FlatQuadTree.
+
+    Every body moves every frame, so the export and its moments are O(N) regardless, and with many
+    bodies some leaf splits or merges on nearly every frame; a refit costs about as much as
+    FlatQuadTree.build. What it buys is cells that do not shift with the bounding box each frame.
+    """
+
+    def __init__(self, capacity: int = PhysicsConfig.TREE_LEAF_CAPACITY, merge_threshold: int = None,
+                 max_depth: int = PhysicsConfig.TREE_MAX_DEPTH):
+        self.capacity = capacity
+        self.merge_threshold = merge_threshold if merge_threshold is not None else capacity // 2
+        self.max_depth = max_depth
+
+        self.centers = np.zeros((64, 2))
+        self.half_sizes = np.zeros(64)
+        self.children = np.full((64, 4), -1, dtype=np.int64)
+        self.parents = np.full(64, -1, dtype=np.int64)
+        self.depths = np.zeros(64, dtype=np.int64)
+        self.counts = np.zeros(64, dtype=np.int64)
+        self.alive = np.zeros(64, dtype=bool)
+        self.free: List[int] = []
+        self.node_total = 0
+
+        self.members: Dict[int, Set[int]] = {}
+        self.leaf_of_id = np.full(0, -1, dtype=np.int64)
+        self._positions = np.zeros((0, 2))
+        self._row_of_id = np.full(0, -1, dtype=np.int64)
+        self.moved = 0
+
+        self.root = self._new_node((BoardConfig.WIDTH / 2, BoardConfig.HEIGHT / 2),
+                                   max(BoardConfig.WIDTH, BoardConfig.HEIGHT) / 2, -1, 0)
+        self.members[self.root] = set()
+
+    def refit(self, positions: np.ndarray, masses: np.ndarray, ids: np.ndarray) -> FlatQuadTree:
+        id_space = int(ids.max()) + 1 if len(ids) else 0
+        if len(self.leaf_of_id) < id_space:
+            grown = np.full(max(id_space, 2 * len(self.leaf_of_id)), -1, dtype=np.int64)
+            grown[:len(self.leaf_of_id)] = self.leaf_of_id
+            self.leaf_of_id = grown
+        self._positions = positions
+        self._row_of_id = np.full(len(self.leaf_of_id), -1, dtype=np.int64)
+        self._row_of_id[ids] = np.arange(len(ids))
+
+        # Bodies that were merged away or otherwise removed since the last frame
+        dirty = set()
+        for particle_id in np.flatnonzero((self.leaf_of_id >= 0) & (self._row_of_id < 0)).tolist():
+            dirty.add(self._remove(particle_id))
+
+        if len(ids):
+            self._grow_to(positions.min(axis=0), positions.max(axis=0))
+
+        # Bodies that are new or have crossed out of their leaf cell; everyone else stays put
+        leaves = self.leaf_of_id[ids]
+        cells = np.maximum(leaves, 0)
+        lower = self.centers[cells] - self.half_sizes[cells, None]
+        upper = self.centers[cells] + self.half_sizes[cells, None]
+        outside = ((positions < lower) | (positions >= upper)).any(axis=1)
+        movers = ids[(leaves < 0) | outside].tolist()
+        self.moved = len(movers)
+
+        for particle_id in movers:
+            if self.leaf_of_id[particle_id] >= 0:
+                dirty.add(self._remove(particle_id))
+        for leaf in dirty:
+            self._merge_from(leaf)
+        for particle_id in movers:
+            self._insert(particle_id)
+
+        return self._export(positions, masses, ids)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """The node pool and body placement, enough to continue refitting exactly where this tree left off."""
+        total = self.node_total
+        return {
+            "centers": self.centers[:total], "half_sizes": self.half_sizes[:total],
+            "children": self.children[:total], "parents": self.parents[:total], "depths": self.depths[:total],
+            "counts": self.counts[:total], "alive": self.alive[:total], "leaf_of_id": self.leaf_of_id,
+            "free": np.array(self.free, dtype=np.int64), "root": np.array([self.root], dtype=np.int64),
+        }
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        total = len(state["half_sizes"])
+        while len(self.half_sizes) < total:
+            self._grow_pool()
+        for name in ("centers", "half_sizes", "children", "parents", "depths", "counts", "alive"):
+            getattr(self, name)[:total] = state[name]
+        self.node_total = total
+        self.leaf_of_id = np.array(state["leaf_of_id"], dtype=np.int64)
+        self.free = [int(node) for node in state["free"]]
+        self.root = int(state["root"][0])
+        leaves = np.flatnonzero(self.alive[:total] & (self.children[:total] < 0).all(axis=1))
+        self.members = {int(leaf): set() for leaf in leaves}
+        for particle_id in np.flatnonzero(self.leaf_of_id >= 0).tolist():
+            self.members[int(self.leaf_of_id[particle_id])].add(particle_id)
+
+    def _new_node(self, center, half_size: float, parent: int, depth: int) -> int:
+        if self.free:
+            node = self.free.pop()
+        else:
+            if self.node_total == len(self.half_sizes):
+                self._grow_pool()
+            node = self.node_total
+            self.node_total += 1
+        self.centers[node] = center
+        self.half_sizes[node] = half_size
+        self.children[node] = -1
+        self.parents[node] = parent
+        self.depths[node] = depth
+        self.counts[node] = 0
+        self.alive[node] = True
+        return node
+
+    def _grow_pool(self) -> None:
+        size = 2 * len(self.half_sizes)
+        for name, fill in (('centers', 0.0), ('half_sizes', 0.0), ('children', -1), ('parents', -1),
+                           ('depths', 0), ('counts', 0), ('alive', False)):
+            old = getattr(self, name)
+            grown = np.full((size,) + old.shape[1:], fill, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _free_subtree(self, node: int) -> Set[int]:
+        collected = self.members.pop(node, set())
+        for child in self.children[node].tolist():
+            if child >= 0:
+                collected |= self._free_subtree(child)
+        self.alive[node] = False
+        self.free.append(node)
+        return collected
+
+    def _quadrant(self, node: int, position) -> int:
+        center = self.centers[node]
+        return int(position[0] >= center[0]) | (int(position[1] >= center[1]) << 1)
+
+    def _child(self, node: int, quadrant: int) -> int:
+        child = self.children[node, quadrant]
+        if child < 0:
+            half = self.half_sizes[node] / 2
+            offset = np.array([half if quadrant & 1 else -half, half if quadrant & 2 else -half])
+            child = self._new_node(self.centers[node] + offset, half, node, self.depths[node] + 1)
+            self.children[node, quadrant] = child
+            self.members[child] = set()
+        return child
+
+    def _insert(self, particle_id: int) -> None:
+        position = self._positions[self._row_of_id[particle_id]]
+        node = self.root
+        self.counts[node] += 1
+        while node not in self.members:
+            node = self._child(node, self._quadrant(node, position))
+            self.counts[node] += 1
+        self.members[node].add(particle_id)
+        self.leaf_of_id[particle_id] = node
+        if len(self.members[node]) > self.capacity:
+            self._split(node)
+
+    def _split(self, node: int) -> None:
+        if self.depths[node] >= self.max_depth:
+            return
+        residents = self.members.pop(node)
+        for particle_id in residents:
+            child = self._child(node, self._quadrant(node, self._positions[self._row_of_id[particle_id]]))
+            self.members[child].add(particle_id)
+            self.counts[child] += 1
+            self.leaf_of_id[particle_id] = child
+        for child in self.children[node].tolist():
+            if child >= 0 and len(self.members[child]) > self.capacity:
+                self._split(child)
+
+    def _remove(self, particle_id: int) -> int:
+        leaf = int(self.leaf_of_id[particle_id])
+        self.members[leaf].discard(particle_id)
+        self.leaf_of_id[particle_id] = -1
+        node = leaf
+        while node >= 0:
+            self.counts[node] -= 1
+            node = self.parents[node]
+        return leaf
+
+    def _merge_from(self, leaf: int) -> None:
+        if not self.alive[leaf]:
+            return
+        # Collapse the highest under-occupied ancestor so one pass handles a whole emptied branch
+        target = -1
+        node = leaf
+        while node >= 0:
+            if self.counts[node] <= self.merge_threshold:
+                target = node
+            node = self.parents[node]
+        if target < 0:
+            return
+
+        parent = self.parents[target]
+        if self.counts[target] == 0 and parent >= 0:
+            self.children[parent, self.children[parent] == target] = -1
+            self._free_subtree(target)
+            return
+        if target in self.members:
+            return
+        residents = set()
+        for child in self.children[target].tolist():
+            if child >= 0:
+                residents |= self._free_subtree(child)
+        self.children[target] = -1
+        self.members[target] = residents
+        self.leaf_of_id[list(residents)] = target
+
+    def _grow_to(self, lower: np.ndarray, upper: np.ndarray) -> None:
+        while True:
+            center, half = self.centers[self.root], self.half_sizes[self.root]
+            below = lower < center - half
+            above = upper >= center + half
+            if not (below | above).any():
+                return
+            # Old root becomes one quadrant of a root twice its size, extended towards the escaped bodies
+            new_center = center + np.where(below, -half, half)
+            new_root = self._new_node(new_center, 2 * half, -1, 0)
+            quadrant = self._quadrant(new_root, center)
+            if self.counts[self.root] == 0 and self.root in self.members:
+                self._free_subtree(self.root)
+                self.members[new_root] = set()
+            else:
+                self.children[new_root, quadrant] = self.root
+                self.parents[self.root] = new_root
+                self.counts[new_root] = self.counts[self.root]
+                self.depths[self.alive] += 1
+                self.depths[new_root] = 0
+            self.root = new_root
+
+    def _export(self, positions: np.ndarray, masses: np.ndarray, ids: np.ndarray) -> FlatQuadTree:
+        nodes = np.flatnonzero(self.alive[:self.node_total])
+        nodes = nodes[np.argsort(self.depths[nodes], kind='stable')]
+        remap = np.full(self.node_total, -1, dtype=np.int64)
+        remap[nodes] = np.arange(len(nodes))
+
+        depths = self.depths[nodes]
+        half_sizes = self.half_sizes[nodes]
+        centers = self.centers[nodes]
+        children = self.children[nodes]
+        children = np.where(children >= 0, remap[np.maximum(children, 0)], -1)
+        parents = np.where(self.parents[nodes] >= 0, remap[np.maximum(self.parents[nodes], 0)], -1)
+        counts = self.counts[nodes]
+
+        # Sorting leaves by the Morton key of their lower corner gives depth-first order,
+        # so every node's bodies end up contiguous
+        leaves = np.flatnonzero((children < 0).all(axis=1))
+        finest = half_sizes[leaves].min() if len(leaves) else 1.0
+        root_lower = centers[0] - half_sizes[0]
+        corners = np.floor((centers[leaves] - half_sizes[leaves, None] - root_lower) / finest + 0.5).astype(np.int64)
+        # Keys are split into high and low 31-bit halves so trees deeper than 32 levels still sort exactly
+        low_bits = np.int64((1 << 31) - 1)
+        high_keys = morton_keys(corners[:, 0] >> 31, corners[:, 1] >> 31)
+        low_keys = morton_keys(corners[:, 0] & low_bits, corners[:, 1] & low_bits)
+        leaves = leaves[np.lexsort((low_keys, high_keys))]
+        leaf_rank = np.zeros(len(nodes), dtype=np.int64)
+        leaf_rank[leaves] = np.arange(len(leaves))
+
+        starts = np.full(len(nodes), np.iinfo(np.int64).max, dtype=np.int64)
+        starts[leaves] = np.cumsum(counts[leaves]) - counts[leaves]
+        for depth in range(int(depths.max()) if len(nodes) else 0, 0, -1):
+            level = np.flatnonzero(depths == depth)
+            np.minimum.at(starts, parents[level], starts[level])
+
+        order = np.argsort(leaf_rank[remap[self.leaf_of_id[ids]]], kind='stable')
+        return FlatQuadTree(order, positions[order], masses[order], centers, half_sizes,
+                            starts, counts, children, parents, depths)
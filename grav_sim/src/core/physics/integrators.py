@@ -0,0 +1,149 @@
+from typing import Dict, Type
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+
+
+class Integrator:
+    """Advances the engine's particle store by ``dt``.
+
+    ``engine.accelerations()`` returns the cached field for the current positions when there is
+    one; ``engine.accelerations(fresh=True)`` re-evaluates it after a drift.
+    """
+    name = ""
+
+    def step(self, engine, dt: float) -> None:
+        raise NotImplementedError
+
+    def state(self, engine) -> Dict[str, np.ndarray]:
+        """Arrays carried between steps, for checkpoints; empty when the engine's cache covers everything."""
+        return {}
+
+    def restore(self, engine, state: Dict[str, np.ndarray]) -> None:
+        pass
+
+    @staticmethod
+    def _kick(engine, accelerations: np.ndarray, dt: float) -> None:
+        engine.particles.velocities += accelerations * dt
+
+    @staticmethod
+    def _drift(engine, dt: float) -> None:
+        engine.particles.positions += engine.particles.velocities * dt
+
+
+class EulerIntegrator(Integrator):
+    # Semi-implicit Euler, the engine's original scheme: first order, one force evaluation per step
+    name = "euler"
+
+    def step(self, engine, dt: float) -> None:
+        self._kick(engine, engine.accelerations(), dt)
+        self._drift(engine, dt)
+        engine.accelerations(fresh=True)
+
+
+class LeapfrogIntegrator(Integrator):
+    # Kick-drift-kick; the closing kick's forces are reused by the next step's opening kick
+    name = "leapfrog"
+
+    def step(self, engine, dt: float) -> None:
+        self._kick(engine, engine.accelerations(), dt / 2)
+        self._drift(engine, dt)
+        self._kick(engine, engine.accelerations(fresh=True), dt / 2)
+
+
+class Yoshida4Integrator(Integrator):
+    # Fourth-order symplectic composition of three leapfrog steps (Yoshida 1990); three evaluations per step
+    name = "yoshida4"
+    W1 = 1 / (2 - 2 ** (1 / 3))
+    W0 = -2 ** (1 / 3) * W1
+
+    def step(self, engine, dt: float) -> None:
+        for weight in (self.W1, self.W0, self.W1):
+            self._kick(engine, engine.accelerations(), weight * dt / 2)
+            self._drift(engine, weight * dt)
+            self._kick(engine, engine.accelerations(fresh=True), weight * dt / 2)
+
+
+class BlockTimestepIntegrator(Integrator):
+    """Hierarchical block timesteps with per-body velocity Verlet.
+
+    Each body sits in a power-of-two bin, dt / 2**level, chosen from eta * sqrt(d_nn / |a|).
+    Forces are evaluated only for the bins that finish at the current sub-tick; everyone else
+    enters those evaluations at second-order predicted positions. A coarser bin is only taken
+    when it lines up with the block grid, so all bodies meet again at the end of the step.
+    """
+    name = "block"
+
+    def __init__(self, eta: float = PhysicsConfig.BLOCK_TIMESTEP_ETA,
+                 max_level: int = PhysicsConfig.BLOCK_TIMESTEP_MAX_LEVEL):
+        self.eta = eta
+        self.max_level = max_level
+        self.levels = np.zeros(0, dtype=np.int64)
+        self._accelerations = None
+        self._nearest = None
+        self._key = None
+
+    def state(self, engine) -> Dict[str, np.ndarray]:
+        if self._key != (id(engine.particles), engine.particles.version):
+            return {}
+        return {"accelerations": self._accelerations, "nearest": self._nearest, "levels": self.levels}
+
+    def restore(self, engine, state: Dict[str, np.ndarray]) -> None:
+        if "accelerations" in state:
+            self._accelerations = state["accelerations"]
+            self._nearest = state["nearest"]
+            self.levels = state["levels"]
+            self._key = (id(engine.particles), engine.particles.version)
+
+    def _wanted_levels(self, accelerations: np.ndarray, nearest_sq: np.ndarray, dt: float) -> np.ndarray:
+        magnitude = np.hypot(accelerations[:, 0], accelerations[:, 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            wanted = self.eta * np.sqrt(np.sqrt(nearest_sq) / magnitude)
+            levels = np.ceil(np.log2(dt / wanted))
+        levels = np.nan_to_num(levels, nan=0.0, posinf=self.max_level, neginf=0.0)
+        return np.clip(levels, 0, self.max_level).astype(np.int64)
+
+    def step(self, engine, dt: float) -> None:
+        particles = engine.particles
+        key = (id(particles), particles.version)
+        if self._key != key:
+            self._accelerations, self._nearest = engine.calculate_accelerations(return_nearest=True)
+            self._key = key
+        accelerations, nearest = self._accelerations, self._nearest
+        positions, velocities = particles.positions, particles.velocities
+
+        ticks = 1 << self.max_level
+        tick_dt = dt / ticks
+        spans = ticks >> self._wanted_levels(accelerations, nearest, dt)
+        times = np.zeros(len(particles), dtype=np.int64)
+        done = np.iinfo(np.int64).max
+
+        while len(times) and times.min() < ticks:
+            ends = np.where(times < ticks, times + spans, done)
+            now = int(ends.min())
+            active = np.flatnonzero(ends == now)
+
+            # Predict everyone to the current sub-tick; only the active bins get new forces
+            tau = (now - times) * tick_dt
+            predicted = positions + velocities * tau[:, None] + 0.5 * accelerations * (tau * tau)[:, None]
+            new_accelerations, new_nearest = engine.calculate_accelerations(
+                positions=predicted, targets=active, return_nearest=True)
+
+            velocities[active] += 0.5 * (accelerations[active] + new_accelerations) * tau[active, None]
+            positions[active] = predicted[active]
+            accelerations[active] = new_accelerations
+            nearest[active] = new_nearest
+            times[active] = now
+
+            # The largest span that keeps this body on the block grid is the lowest set bit of now
+            aligned = now & -now
+            spans[active] = np.minimum(ticks >> self._wanted_levels(new_accelerations, new_nearest, dt), aligned)
+
+        self.levels = self.max_level - np.log2(spans).astype(np.int64)
+
+
+INTEGRATORS: Dict[str, Type[Integrator]] = {
+    integrator.name: integrator
+    for integrator in (EulerIntegrator, LeapfrogIntegrator, Yoshida4Integrator, BlockTimestepIntegrator)
+}
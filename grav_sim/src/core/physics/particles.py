@@ -0,0 +1,185 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Unnamed bodies go by this prefix and their id, so names of that form are reserved
+DEFAULT_NAME_PREFIX = "Entity_"
+
+
+class ParticleStore:
+    """Structure-of-arrays storage for every body in the simulation.
+
+    Each body has a stable integer id that survives compaction; ``index_of``
+    maps it to the body's current row in the arrays.
+    """
+
+    def __init__(self):
+        self.positions = np.zeros((0, 2), dtype=np.float64)
+        self.old_positions = np.zeros((0, 2), dtype=np.float64)
+        self.velocities = np.zeros((0, 2), dtype=np.float64)
+        self.masses = np.zeros(0, dtype=np.float64)
+        self.densities = np.zeros(0, dtype=np.float64)
+        self.colors = np.zeros((0, 3), dtype=np.uint8)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.names: Dict[int, str] = {}
+        self._ids_by_name: Dict[str, int] = {}
+        self._index_of_id = np.zeros(0, dtype=np.int64)
+        self._next_id = 0
+        # Bumped whenever rows are added or removed so cached per-row results can be invalidated
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def radii(self) -> np.ndarray:
+        return np.sqrt(self.masses / (self.densities * math.pi))
+
+    def index_of(self, particle_id: int) -> int:
+        if 0 <= particle_id < len(self._index_of_id):
+            return self._index_of_id.item(particle_id)
+        return -1
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def id_of(self, name: str) -> Optional[int]:
+        particle_id = self._ids_by_name.get(name)
+        if particle_id is not None:
+            return particle_id
+        # Unnamed bodies answer to the default name name_of gives them
+        particle_id = self.default_id(name)
+        if particle_id is None or particle_id in self.names or self.index_of(particle_id) < 0:
+            return None
+        return particle_id
+
+    def name_of(self, particle_id: int) -> str:
+        return self.names.get(particle_id, f"{DEFAULT_NAME_PREFIX}{particle_id}")
+
+    @staticmethod
+    def default_id(name: str) -> Optional[int]:
+        """The id whose default name is ``name``, or None if ``name`` is not of the reserved form."""
+        suffix = name[len(DEFAULT_NAME_PREFIX):]
+        if name.startswith(DEFAULT_NAME_PREFIX) and suffix.isdigit() and str(int(suffix)) == suffix:
+            return int(suffix)
+        return None
+
+    def extend(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray,
+               densities: np.ndarray, colors: np.ndarray, names: Optional[Iterable[Optional[str]]] = None) -> np.ndarray:
+        count = len(masses)
+        new_ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        named, taken = {}, {}
+        if names is not None:
+            for particle_id, name in zip(new_ids.tolist(), names):
+                if name is None:
+                    continue
+                reserved = self.default_id(name)
+                if reserved is None:
+                    owner = self._ids_by_name.get(name, taken.get(name))
+                    if owner is not None:
+                        raise ValueError(f"Name {name!r} is already taken by the body with id {owner}")
+                    named[particle_id] = name
+                    taken[name] = particle_id
+                elif reserved != particle_id:
+                    raise ValueError(f"Name {name!r} is reserved for the unnamed body with id {reserved}")
+                # A reserved name on its own id is just the default name, so the body stays unnamed
+        self._next_id += count
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(count, 2)
+        self.positions = np.concatenate([self.positions, positions])
+        self.old_positions = np.concatenate([self.old_positions, positions])
+        self.velocities = np.concatenate([self.velocities, np.asarray(velocities, dtype=np.float64).reshape(count, 2)])
+        self.masses = np.concatenate([self.masses, np.asarray(masses, dtype=np.float64)])
+        self.densities = np.concatenate([self.densities, np.asarray(densities, dtype=np.float64)])
+        self.colors = np.concatenate([self.colors, np.asarray(colors, dtype=np.uint8).reshape(count, 3)])
+        self.ids = np.concatenate([self.ids, new_ids])
+
+        for particle_id, name in named.items():
+            self.names[particle_id] = name
+            self._ids_by_name[name] = particle_id
+
+        self._rebuild_index()
+        return new_ids
+
+    def add(self, position: Tuple[float, float], velocity: Tuple[float, float], mass: float, density: float,
+            color: Tuple[int, int, int], name: Optional[str] = None) -> int:
+        new_ids = self.extend(np.array([position]), np.array([velocity]), np.array([mass]),
+                              np.array([density]), np.array([color]), [name])
+        return int(new_ids[0])
+
+    def compact(self, keep: np.ndarray) -> np.ndarray:
+        """Drops every row where ``keep`` is False in one pass and returns the removed ids."""
+        removed = self.ids[~keep]
+        self.positions = self.positions[keep]
+        self.old_positions = self.old_positions[keep]
+        self.velocities = self.velocities[keep]
+        self.masses = self.masses[keep]
+        self.densities = self.densities[keep]
+        self.colors = self.colors[keep]
+        self.ids = self.ids[keep]
+
+        for particle_id in removed.tolist():
+            name = self.names.pop(particle_id, None)
+            if name is not None:
+                self._ids_by_name.pop(name, None)
+
+        self._rebuild_index()
+        return removed
+
+    def remove(self, particle_ids: Iterable[int]) -> np.ndarray:
+        keep = np.ones(len(self), dtype=bool)
+        indices = [self.index_of(particle_id) for particle_id in particle_ids]
+        keep[[index for index in indices if index >= 0]] = False
+        return self.compact(keep)
+
+    def _rebuild_index(self) -> None:
+        self.version += 1
+        if len(self._index_of_id) < self._next_id:
+            grown = np.full(max(self._next_id, 2 * len(self._index_of_id)), -1, dtype=np.int64)
+            grown[:len(self._index_of_id)] = self._index_of_id
+            self._index_of_id = grown
+        self._index_of_id[:] = -1
+        self._index_of_id[self.ids] = np.arange(len(self.ids), dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, ids: np.ndarray, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray,
+                    densities: np.ndarray, colors: np.ndarray, names: Optional[Dict[int, str]] = None,
+                    old_positions: Optional[np.ndarray] = None, next_id: Optional[int] = None,
+                    ids_by_name: Optional[Dict[str, int]] = None) -> 'ParticleStore':
+        """Wraps existing arrays, without copying, as a store whose rows keep the given ids.
+
+        ``ids_by_name`` is the inverse of ``names``; pass it when already built to skip rebuilding it.
+        """
+        store = cls()
+        store.positions = positions
+        store.old_positions = old_positions if old_positions is not None else positions
+        store.velocities = velocities
+        store.masses = masses
+        store.densities = densities
+        store.colors = colors
+        store.ids = np.asarray(ids, dtype=np.int64)
+        store._next_id = int(store.ids.max()) + 1 if len(store.ids) else 0
+        if next_id is not None:
+            store._next_id = max(store._next_id, next_id)
+        if names:
+            store.names = names
+            store._ids_by_name = ids_by_name if ids_by_name is not None else \
+                {name: particle_id for particle_id, name in names.items()}
+        store._rebuild_index()
+        return store
+
+    @classmethod
+    def from_entities(cls, entities: List['Entity']) -> 'ParticleStore':
+        store = cls()
+        if entities:
+            store.extend(
+                positions=np.array([(e.position.x, e.position.y) for e in entities]),
+                velocities=np.array([tuple(e.get_velocity_vector()) for e in entities]),
+                masses=np.array([e.mass for e in entities]),
+                densities=np.array([e.density for e in entities]),
+                colors=np.array([e.color for e in entities]),
+                names=[e.name for e in entities],
+            )
+        return store
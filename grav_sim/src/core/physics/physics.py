@@ -1,169 +1,218 @@
 import math
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple
 
-import pygame
-from pygame.math import Vector2
-from pygame import Rect
-from grav_sim.src.config.settings import PhysicsConfig, BoardConfig
+import numpy as np
+
+from grav_sim.src.config.settings import DiagnosticsConfig, PhysicsConfig, RecordingConfig
 from grav_sim.src.core.entity.entity import Entity
-from multiprocessing import Pool, cpu_count
-
-# QuadTree Node to manage space partitioning
-class QuadTreeNode:
-    def __init__(self, boundary: Rect, capacity: int = 50):
-        self.area_rect = boundary
-        self.capacity = capacity
-        self.entities = []
-        self.divided = False
-        self.northwest = self.northeast = self.southwest = self.southeast = None
-        self.center_of_mass = Vector2(0, 0)
-        self.total_mass = 0
-
-    def subdivide(self):
-        x, y, w, h = self.area_rect
-        half_w, half_h = w / 2, h / 2
-
-        self.northwest, self.northeast, self.southwest, self.southeast = (
-            QuadTreeNode(Rect(x, y, half_w, half_h)),
-            QuadTreeNode(Rect(x + half_w, y, half_w, half_h)),
-            QuadTreeNode(Rect(x, y + half_h, half_w, half_h)),
-            QuadTreeNode(Rect(x + half_w, y + half_h, half_w, half_h))
-        )
-        self.divided = True
-        for entity in self.entities:
-            self._insert_to_children(entity)
-        self.entities.clear()
-
-    def _insert_to_children(self, entity: Entity) -> bool:
-        return any(child.insert(entity) for child in [self.northwest, self.northeast, self.southwest, self.southeast])
-
-    def insert(self, entity: Entity) -> bool:
-        if not self.area_rect.colliderect(entity.realRect):
-            return False
-        if len(self.entities) < self.capacity and not self.divided:
-            self.entities.append(entity)
-            self._update_mass_center(entity)
-            return True
-        if not self.divided:
-            self.subdivide()
-        return self._insert_to_children(entity)
-
-    def _update_mass_center(self, entity: Entity):
-        self.center_of_mass = (self.center_of_mass * self.total_mass + entity.position * entity.mass) / (self.total_mass + entity.mass)
-        self.total_mass += entity.mass
-
-    def query_range(self, range_rect: Rect) -> List[Entity]:
-        if not self.area_rect.colliderect(range_rect):
-            return []
-        found = [e for e in self.entities if range_rect.colliderect(e.realRect)]
-        if self.divided:
-            for child in [self.northwest, self.northeast, self.southwest, self.southeast]:
-                found.extend(child.query_range(range_rect))
-        return found
+from grav_sim.src.core.entity.views import EntityMap
+from grav_sim.src.core.physics.broadphase import NeighbourList
+from grav_sim.src.core.physics.collision import merge_clusters, swept_circle_hits
+from grav_sim.src.core.physics.diagnostics import ConservationMonitor
+from grav_sim.src.core.physics.integrators import INTEGRATORS
+from grav_sim.src.core.physics.particles import ParticleStore
+from grav_sim.src.core.physics.solvers import SOLVERS
+from grav_sim.src.core.physics.tree import FlatQuadTree
+from grav_sim.src.core.physics.workers import WorkerPool
+from grav_sim.src.core.profiler import profiler
+from grav_sim.src.core.recording import TrajectoryRecorder
 
 class PhysicsEngine:
-    NO_FORCE_VECTOR = Vector2(0, 0)
-
-    def __init__(self, entities: List[Entity]):
-        self.entities = {entity.name: entity for entity in entities}
-        self.quad_tree = None
-        self.pool = Pool(processes=cpu_count())
-
-    @staticmethod
-    def _calculate_gravitational_force(G: float, entity: Entity, attractor: Union[Entity, QuadTreeNode]) -> Vector2:
-        attractor_pos = attractor.position if isinstance(attractor, Entity) else attractor.center_of_mass
-        attractor_mass = attractor.mass if isinstance(attractor, Entity) else attractor.total_mass
-        direction = attractor_pos - entity.position
-        distance = max(direction.length(), 1e-5)
-        force = G * entity.mass * attractor_mass / (distance * distance)
-        return direction.normalize() * (force / entity.mass)
-
-    @staticmethod
-    def _calculate_gravity_vector(entity: Entity, quad_tree: QuadTreeNode, G: float, theta: float = 0.5) -> Vector2:
-        def apply_force(node: QuadTreeNode) -> Vector2:
-            direction = node.center_of_mass - entity.position
-            distance = max(direction.length(), 1e-5)
-            if node.total_mass == 0:
-                return PhysicsEngine.NO_FORCE_VECTOR
-            if len(node.entities) == 1 and node.entities[0] is entity:
-                return PhysicsEngine.NO_FORCE_VECTOR
-            if node.area_rect.width / distance < theta or len(node.entities) == 1:
-                return PhysicsEngine._calculate_gravitational_force(G, entity, node)
-            if node.divided:
-                return sum(
-                    (apply_force(child) for child in [node.northwest, node.northeast, node.southwest, node.southeast]),
-                    PhysicsEngine.NO_FORCE_VECTOR)
-            return sum((PhysicsEngine._calculate_gravitational_force(G, entity, other) for other in node.entities if
-                        other is not entity), PhysicsEngine.NO_FORCE_VECTOR)
-
-        initial_velocity = entity.get_velocity_vector().length()
-        gravity_vector = apply_force(quad_tree)
-        new_velocity = (entity.get_velocity_vector() + gravity_vector).length()
-
-        if new_velocity > 2 * initial_velocity:
-            print(f"High velocity increase detected for {entity.name}: {initial_velocity} -> {new_velocity}")
-
-        return gravity_vector
-
-    @staticmethod
-    def _process_entity(args: Tuple[Entity, QuadTreeNode, float]) -> Entity:
-        entity, quad_tree, time_scale = args
+    def __init__(self, entities: List[Entity], solver: str = PhysicsConfig.FORCE_SOLVER,
+                 pool: Optional[WorkerPool] = None, integrator: str = PhysicsConfig.INTEGRATOR,
+                 substeps: int = PhysicsConfig.SUBSTEPS, diagnostics_interval: int = DiagnosticsConfig.INTERVAL):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown force solver: {solver}")
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Unknown integrator: {integrator}")
+        self.solver = SOLVERS[solver]()
+        self.integrator = INTEGRATORS[integrator]()
+        self.substeps = max(1, int(substeps))
+        self._accelerations = None
+        self._accelerations_key = None
+        # Potentials from the force evaluation before a diagnostics sample, with the positions and rows they are for
+        self._potentials = None
+        self._potentials_wanted = False
+        self.force_evaluations = 0
+        self.steps = 0
+        self.time = 0.0
+        self.recorder: Optional[TrajectoryRecorder] = None
+        self.diagnostics = ConservationMonitor(diagnostics_interval) if diagnostics_interval > 0 else None
+        self.particles = ParticleStore.from_entities(entities)
+        self.entities = EntityMap(self.particles)
+        for entity, particle_id in zip(entities, self.particles.ids.tolist()):
+            entity.bind(self.particles, particle_id)
+            self.entities.add(entity)
+        self.neighbours = NeighbourList()
+        self.gravity_tree = None
+        self._gravity_tree_key = None
+        self._spatial_index = (None, None)
+        # Shared with the caller and reused across engines, so scenario switches keep the same workers
+        self.pool = pool
+
+    def add_entity(self, entity: Entity) -> None:
         velocity = entity.get_velocity_vector()
-        gravity = PhysicsEngine._calculate_gravity_vector(entity, quad_tree, PhysicsConfig.GRAVITY_CONSTANT * time_scale)
-
-        new_velocity = velocity + gravity
-        entity.velocity = new_velocity.length()
-        entity.direction = math.atan2(new_velocity.y, new_velocity.x)
-        movement = new_velocity * time_scale
-        entity.move(entity.position.x + movement.x, entity.position.y + movement.y)
-        return entity
-
-    def get_colliding_pairs(self):
-        colliding_pairs = set()
-        for entity in self.entities.values():
-            for other in self.quad_tree.query_range(entity.realRect):
-                if entity.name != other.name and self._check_collision(entity, other):
-                    colliding_pairs.add(frozenset([entity.name, other.name]))
-        return colliding_pairs
-
-    def _check_collision(self, entity1: Entity, entity2: Entity) -> bool:
-        mask1 = pygame.mask.from_surface(entity1.collision_mask)
-        mask2 = pygame.mask.from_surface(entity2.collision_mask)
-
-        offset_x = int(entity2.position.x - entity1.position.x)
-        offset_y = int(entity2.position.y - entity1.position.y)
-
-        return mask1.overlap(mask2, (offset_x, offset_y)) is not None
-
-
+        particle_id = self.particles.add((entity.position.x, entity.position.y), (velocity.x, velocity.y),
+                                         entity.mass, entity.density, entity.color, entity.name)
+        entity.bind(self.particles, particle_id)
+        self.entities.add(entity)
+
+    def replace_particles(self, particles: ParticleStore) -> None:
+        """Adopts ``particles`` wholesale, e.g. a restored checkpoint or a generated scenario.
+
+        Entity views over it are only created as bodies are looked up.
+        """
+        self.particles = particles
+        self.entities = EntityMap(particles)
+        self.neighbours.invalidate()
+        self.solver.reset()
+        self._potentials = None
+
+    def start_recording(self, path: str, metadata: Optional[dict] = None, interval: int = 1) -> TrajectoryRecorder:
+        self.stop_recording()
+        particles = self.particles
+        slots = int(math.ceil((int(particles.ids.max(initial=-1)) + 1) * RecordingConfig.SLOT_HEADROOM)) + 1
+        metadata = dict(metadata or {}, solver=self.solver.name, integrator=self.integrator.name, substeps=self.substeps,
+                        gravity_constant=PhysicsConfig.GRAVITY_CONSTANT, softening=PhysicsConfig.SOFTENING,
+                        start_step=self.steps, start_time=self.time, names=dict(particles.names),
+                        densities=particles.densities.tolist(), colors=particles.colors.tolist(),
+                        ids=particles.ids.tolist())
+        self.recorder = TrajectoryRecorder(path, slots, metadata, interval)
+        return self.recorder
+
+    def stop_recording(self) -> Optional[TrajectoryRecorder]:
+        """Closes the current recording, if any, and returns its recorder for the final counts."""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+        return recorder
+
+    def accelerations(self, fresh: bool = False) -> np.ndarray:
+        # Forces at the current positions, reused until the positions move or rows change
+        key = (id(self.particles), self.particles.version)
+        if fresh or self._accelerations_key != key:
+            self._accelerations = self.calculate_accelerations()
+            self._accelerations_key = key
+        return self._accelerations
+
+    def cached_accelerations(self) -> Optional[np.ndarray]:
+        if self._accelerations_key != (id(self.particles), self.particles.version):
+            return None
+        return self._accelerations
+
+    def prime_accelerations(self, accelerations: np.ndarray) -> None:
+        # Accelerations known to belong to the current positions, e.g. restored from a checkpoint
+        self._accelerations = accelerations
+        self._accelerations_key = (id(self.particles), self.particles.version)
+
+    def calculate_accelerations(self, positions: Optional[np.ndarray] = None, targets: Optional[np.ndarray] = None,
+                                return_nearest: bool = False):
+        """Accelerations of ``targets`` (every body by default) with all bodies at ``positions``.
+
+        With ``return_nearest`` also returns squared nearest-neighbour distances for the same rows.
+        """
+        particles = self.particles
+        positions = particles.positions if positions is None else positions
+        count = len(particles)
+        target_count = count if targets is None else len(targets)
+        self.force_evaluations += target_count
+        if target_count == 0:
+            empty = np.zeros((0, 2))
+            return (empty, np.zeros(0)) if return_nearest else empty
+        parallel = self.pool is not None and target_count >= PhysicsConfig.PARALLEL_MIN_BODIES
+        potentials = np.empty(count) if self._potentials_wanted and targets is None and \
+            positions is particles.positions else None
+        result = self.solver.accelerations(positions, particles.masses, particles.ids, PhysicsConfig.GRAVITY_CONSTANT,
+                                           targets, return_nearest, self.pool if parallel else None, potentials)
+        self.gravity_tree = self.solver.tree
+        self._gravity_tree_key = (id(particles), particles.version)
+        if potentials is not None:
+            self._potentials = (potentials, positions.copy(), self._gravity_tree_key)
+        return result
+
+    def potentials(self) -> np.ndarray:
+        """Softened specific potential of every body at the current positions, from the active solver's kernel.
+
+        On diagnostics steps they come out of the last force evaluation; only if the bodies merged or moved
+        since, or the integrator evaluated a subset, does the solver compute them on their own.
+        """
+        particles = self.particles
+        if self._potentials is not None:
+            potentials, positions, key = self._potentials
+            if key == (id(particles), particles.version) and np.array_equal(positions, particles.positions):
+                return potentials
+        return self.solver.potentials(particles.positions, particles.masses, PhysicsConfig.GRAVITY_CONSTANT)
+
+    def spatial_index(self, build: bool = True) -> Optional[FlatQuadTree]:
+        """A tree over the current positions for range, radius and nearest-body queries.
+
+        The last gravity tree is reused when it was built over exactly these rows and positions; otherwise
+        one is built and kept until they change, or None is returned if ``build`` is False.
+        """
+        particles = self.particles
+        key = (id(particles), particles.version)
+        for tree, tree_key in ((self.gravity_tree, self._gravity_tree_key), self._spatial_index):
+            if tree is not None and tree_key == key and tree.covers(particles.positions):
+                return tree
+        if not build:
+            return None
+        tree = FlatQuadTree.build(particles.positions, particles.masses)
+        self._spatial_index = (tree, key)
+        return tree
+
+    def get_colliding_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        particles = self.particles
+        radii = particles.radii
+        first, second = self.neighbours.candidates(particles.old_positions, particles.positions, radii, particles.ids)
+        hits = swept_circle_hits(particles.old_positions, particles.positions, radii, first, second)
+        return first[hits], second[hits]
 
     def handle_collisions(self):
-        new_entities = {e.name: e for e in self.entities.values()}
-
-        def resolve_collision(pair):
-            e1, e2 = pair
-            if e1 in new_entities and e2 in new_entities:
-                larger, smaller = sorted([new_entities[e1], new_entities[e2]], key=lambda x: -x.mass)
-                larger.consume(smaller)
-                del new_entities[smaller.name]
+        particles = self.particles
+        first, second = self.get_colliding_pairs()
+        if len(first) == 0:
+            return self.entities
 
-        list(map(resolve_collision, self.get_colliding_pairs()))
+        keep = merge_clusters(particles, first, second)
+        profiler.count("merges", int(len(keep) - keep.sum()))
+        self.entities.discard(particles.compact(keep).tolist())
 
-        return new_entities
+        return self.entities
 
     def update(self, time_scale: float) -> None:
-        self.quad_tree = QuadTreeNode(Rect(0, 0, BoardConfig.WIDTH, BoardConfig.HEIGHT))
-        for entity in self.entities.values():
-            self.quad_tree.insert(entity)
-
-        update_args = [(entity, self.quad_tree, time_scale) for entity in self.entities.values()]
-        updated_entities = self.pool.map(self._process_entity, update_args)
-        self.entities = {entity.name: entity for entity in updated_entities}
-
-        # Step 3: Handle collisions after gravitational effects
-        self.entities = self.handle_collisions()
-
-    def __del__(self):
-        self.pool.close()
-        self.pool.join()
-
+        particles = self.particles
+        dt = time_scale / self.substeps
+        sampling = self.diagnostics is not None and self.diagnostics.due(self.steps + 1)
+
+        for substep in range(self.substeps):
+            # The last evaluation of the last substep is at the positions the sample will see
+            self._potentials_wanted = sampling and substep == self.substeps - 1
+            initial_speed = np.hypot(particles.velocities[:, 0], particles.velocities[:, 1])
+            particles.old_positions[:] = particles.positions
+            with profiler.span("integration"):
+                self.integrator.step(self, dt)
+
+            new_speed = np.hypot(particles.velocities[:, 0], particles.velocities[:, 1])
+            flagged = np.flatnonzero(new_speed > 2 * initial_speed)
+            if len(flagged):
+                index = flagged[0]
+                name = particles.name_of(int(particles.ids[index]))
+                profiler.warn("high_velocity_increase",
+                              f"High velocity increase detected for {name}: {initial_speed[index]} -> "
+                              f"{new_speed[index]}" + (f" and {len(flagged) - 1} other bodies" if len(flagged) > 1 else ""),
+                              amount=len(flagged))
+
+            # Handle collisions after every substep so the swept test only spans a straight segment
+            with profiler.span("collision"):
+                self.handle_collisions()
+
+        self._potentials_wanted = False
+        self.steps += 1
+        self.time += time_scale
+        if self.recorder is not None and self.steps % self.recorder.interval == 0:
+            self.recorder.record(self)
+        if self.diagnostics is not None and self.diagnostics.due(self.steps) and len(particles):
+            with profiler.span("diagnostics"):
+                sample = self.diagnostics.measure(self)
+            for name in ("energy_error", "momentum_error", "angular_momentum_error", "center_of_mass_drift"):
+                profiler.gauge(name, sample[name])
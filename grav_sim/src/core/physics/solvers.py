@@ -0,0 +1,240 @@
+import time
+from typing import Dict, Optional, Sequence, Type
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+from grav_sim.src.core.physics.direct import direct_accelerations, direct_potentials
+from grav_sim.src.core.physics.dynamic_tree import DynamicQuadTree
+from grav_sim.src.core.physics.tree import FlatQuadTree
+from grav_sim.src.core.physics.workers import WorkerPool
+from grav_sim.src.core.profiler import profiler
+
+
+class ForceSolver:
+    """Turns particle arrays into gravitational accelerations.
+
+    ``accelerations`` returns one row per target (every body by default), in target order. With
+    ``return_nearest`` it also returns squared nearest-neighbour distances for the same rows, and a
+    ``potentials`` array is filled with the same rows' potentials from the same evaluation. A
+    ``pool`` is passed only when the call is large enough to be worth splitting across workers.
+    """
+    name = ""
+
+    @property
+    def tree(self) -> Optional[FlatQuadTree]:
+        """The tree built by the last evaluation, if the solver builds one; the engine reuses it for queries."""
+        return None
+
+    def accelerations(self, positions: np.ndarray, masses: np.ndarray, ids: np.ndarray, G: float,
+                      targets: Optional[np.ndarray] = None, return_nearest: bool = False,
+                      pool: Optional[WorkerPool] = None, potentials: Optional[np.ndarray] = None):
+        raise NotImplementedError
+
+    def potentials(self, positions: np.ndarray, masses: np.ndarray, G: float) -> np.ndarray:
+        """Potentials alone, for when no force evaluation at these positions asked for them."""
+        raise NotImplementedError
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays carried between evaluations, for checkpoints; empty when every evaluation starts afresh."""
+        return {}
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        pass
+
+    def reset(self) -> None:
+        """Forgets anything tied to the previous set of bodies, e.g. after a checkpoint is loaded."""
+
+
+SOLVERS: Dict[str, Type[ForceSolver]] = {}
+
+
+def register_solver(solver: Type[ForceSolver]) -> Type[ForceSolver]:
+    """Makes ``solver`` selectable by its name in PhysicsConfig.FORCE_SOLVER and on the command line."""
+    SOLVERS[solver.name] = solver
+    return solver
+
+
+@register_solver
+class DirectSolver(ForceSolver):
+    # Exact pairwise summation: O(N^2), but with no build cost it wins for small N
+    name = "direct"
+
+    def accelerations(self, positions, masses, ids, G, targets=None, return_nearest=False, pool=None,
+                      potentials=None):
+        kernel = pool.direct_accelerations if pool is not None else direct_accelerations
+        with profiler.span("force"):
+            return kernel(positions, masses, G, targets=targets, return_nearest=return_nearest, potentials=potentials)
+
+    def potentials(self, positions, masses, G):
+        return direct_potentials(positions, masses, G)
+
+
+@register_solver
+class TreeSolver(ForceSolver):
+    # Barnes-Hut over a tree rebuilt from scratch every evaluation
+    name = "tree"
+
+    def __init__(self, theta: float = PhysicsConfig.THETA, capacity: int = PhysicsConfig.TREE_LEAF_CAPACITY):
+        self.theta = theta
+        self.capacity = capacity
+        self._tree = None
+
+    @property
+    def tree(self) -> Optional[FlatQuadTree]:
+        return self._tree
+
+    def build(self, positions: np.ndarray, masses: np.ndarray, ids: np.ndarray) -> FlatQuadTree:
+        return FlatQuadTree.build(positions, masses, capacity=self.capacity)
+
+    def accelerations(self, positions, masses, ids, G, targets=None, return_nearest=False, pool=None,
+                      potentials=None):
+        with profiler.span("tree_build"):
+            self._tree = tree = self.build(positions, masses, ids)
+
+        # Only leaves holding a target are walked; their other residents come along for free
+        groups = None if targets is None else tree.groups_containing(targets)
+        group_potentials = None
+        if potentials is not None:
+            group_potentials = np.empty(len(masses) if groups is None else len(tree.group_bodies(groups)))
+        with profiler.span("force"):
+            if pool is not None:
+                result = pool.tree_accelerations(tree, G, self.theta, groups=groups, return_nearest=return_nearest,
+                                                 potentials=group_potentials)
+            else:
+                result = tree.accelerations(G, self.theta, groups=groups, return_nearest=return_nearest,
+                                            potentials=group_potentials)
+        values = result if return_nearest else (result,)
+        if potentials is not None:
+            values += (group_potentials,)
+
+        if targets is None:
+            values = tuple(tree.unsort(value) for value in values)
+        else:
+            rows = np.empty(len(masses), dtype=np.int64)
+            rows[tree.order[tree.group_bodies(groups)]] = np.arange(len(values[0]))
+            values = tuple(value[rows[targets]] for value in values)
+        if potentials is not None:
+            potentials[:] = values[-1]
+            values = values[:-1]
+        return values if return_nearest else values[0]
+
+    def potentials(self, positions, masses, G):
+        # The force tree when it still covers these bodies; a refit here would change the incremental tree's history
+        tree = self._tree
+        if tree is None or not tree.covers(positions, masses):
+            tree = FlatQuadTree.build(positions, masses, capacity=self.capacity)
+        return tree.unsort(tree.potentials(G, self.theta))
+
+    def reset(self) -> None:
+        self._tree = None
+
+
+@register_solver
+class IncrementalTreeSolver(TreeSolver):
+    # Barnes-Hut over a persistent tree that is refitted as bodies move instead of rebuilt. Its cells stay put,
+    # so the approximation only changes where bodies cross them, but a refit is no cheaper than a fresh build
+    name = "incremental_tree"
+
+    def __init__(self, theta: float = PhysicsConfig.THETA, capacity: int = PhysicsConfig.TREE_LEAF_CAPACITY):
+        super().__init__(theta, capacity)
+        self.dynamic_tree = DynamicQuadTree(capacity)
+
+    def build(self, positions, masses, ids):
+        return self.dynamic_tree.refit(positions, masses, ids)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        # Its layout depends on history, and with it the force approximation, so resuming needs the same tree
+        return self.dynamic_tree.state()
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        self.dynamic_tree.restore(state)
+
+    def reset(self) -> None:
+        super().reset()
+        self.dynamic_tree = DynamicQuadTree(self.capacity)
+
+
+@register_solver
+class AutoSolver(ForceSolver):
+    """Uses whichever candidate is fastest on the bodies at hand, and measures again as their number changes.
+
+    Each candidate is timed on real evaluations of the current state and the chosen one's result is
+    returned, so a selection costs only the extra candidates' evaluations. Direct summation is taken
+    without measuring below ``direct_below`` bodies and never tried above ``direct_above``; above
+    ``measure_above`` nothing is measured and the first remaining candidate is used. A new
+    selection happens once the count leaves the ``reselect`` factor of the count last measured at,
+    e.g. as merges shrink a cloud down to a handful of bodies.
+    """
+    name = "auto"
+
+    def __init__(self, candidates: Sequence[str] = PhysicsConfig.AUTO_SOLVER_CANDIDATES,
+                 trials: int = PhysicsConfig.AUTO_SOLVER_TRIALS,
+                 direct_below: int = PhysicsConfig.AUTO_SOLVER_DIRECT_BELOW,
+                 direct_above: int = PhysicsConfig.AUTO_SOLVER_DIRECT_ABOVE,
+                 measure_above: int = PhysicsConfig.AUTO_SOLVER_MEASURE_ABOVE,
+                 reselect: float = PhysicsConfig.AUTO_SOLVER_RESELECT):
+        unknown = [name for name in candidates if name not in SOLVERS or name == self.name]
+        if unknown or not candidates:
+            raise ValueError(f"Unknown force solver candidates: {', '.join(unknown) or 'none given'}")
+        self.candidates = {name: SOLVERS[name]() for name in candidates}
+        self.trials = max(1, int(trials))
+        self.direct_below = direct_below
+        self.direct_above = direct_above
+        self.measure_above = measure_above
+        self.reselect = reselect
+        self.current: Optional[ForceSolver] = None
+        self.selected_count = 0
+        # Best seconds per evaluation of each candidate at the last selection
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def tree(self) -> Optional[FlatQuadTree]:
+        return self.current.tree if self.current is not None else None
+
+    def accelerations(self, positions, masses, ids, G, targets=None, return_nearest=False, pool=None,
+                      potentials=None):
+        count = len(masses)
+        if self.current is not None and self.reselect * self.selected_count <= count <= \
+                self.selected_count / self.reselect:
+            return self.current.accelerations(positions, masses, ids, G, targets, return_nearest, pool, potentials)
+
+        self.selected_count = count
+        self.timings = {}
+        names = [name for name in self.candidates if name != DirectSolver.name or count <= self.direct_above] \
+            or list(self.candidates)
+        if count <= self.direct_below and DirectSolver.name in self.candidates:
+            names = [DirectSolver.name]
+        elif count > self.measure_above:
+            names = names[:1]
+        if len(names) == 1:
+            self.current = self.candidates[names[0]]
+            return self.current.accelerations(positions, masses, ids, G, targets, return_nearest, pool, potentials)
+
+        results, candidate_potentials = {}, {}
+        for name in names:
+            solver = self.candidates[name]
+            out = None if potentials is None else np.empty_like(potentials)
+            best = np.inf
+            for _ in range(self.trials):
+                start = time.perf_counter()
+                results[name] = solver.accelerations(positions, masses, ids, G, targets, return_nearest, pool, out)
+                best = min(best, time.perf_counter() - start)
+            self.timings[name] = best
+            candidate_potentials[name] = out
+        chosen = min(self.timings, key=self.timings.get)
+        self.current = self.candidates[chosen]
+        profiler.count("solver_selections")
+        if potentials is not None:
+            potentials[:] = candidate_potentials[chosen]
+        return results[chosen]
+
+    def potentials(self, positions, masses, G):
+        solver = self.current if self.current is not None else next(iter(self.candidates.values()))
+        return solver.potentials(positions, masses, G)
+
+    def reset(self) -> None:
+        for solver in self.candidates.values():
+            solver.reset()
+        self.current = None
+        self.selected_count = 0
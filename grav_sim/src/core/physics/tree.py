@@ -0,0 +1,444 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+
+
+def _part1by1(values: np.ndarray) -> np.ndarray:
+    # Spread the low 32 bits of each value so a zero bit sits between every pair
+    values = values.astype(np.uint64) & np.uint64(0x00000000FFFFFFFF)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x3333333333333333)
+    values = (values | (values << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return values
+
+
+def morton_keys(cells_x: np.ndarray, cells_y: np.ndarray) -> np.ndarray:
+    return _part1by1(cells_x) | (_part1by1(cells_y) << np.uint64(1))
+
+
+def expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Concatenation of arange(start, start + count) for every range, without a Python loop
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total, dtype=np.int64)
+
+
+def batch_ranges(sizes: np.ndarray, limit: int):
+    # Split consecutive items into runs whose summed size stays near the limit
+    bounds = np.cumsum(sizes)
+    start = 0
+    while start < len(sizes):
+        base = bounds[start - 1] if start > 0 else 0
+        stop = max(start + 1, int(np.searchsorted(bounds, base + limit, side='right')))
+        yield start, stop
+        start = stop
+
+
+class FlatQuadTree:
+    """Linearized quadtree: every node is a row in flat arrays and owns a contiguous run of ``order``."""
+
+    ARRAY_FIELDS = ('order', 'xs', 'ys', 'masses', 'centers', 'half_sizes', 'starts', 'counts', 'children',
+                    'parents', 'levels', 'is_leaf', 'leaves', 'leaf_lower', 'leaf_upper',
+                    'node_masses', 'centers_of_mass')
+
+    def __init__(self, order: np.ndarray, positions: np.ndarray, masses: np.ndarray,
+                 centers: np.ndarray, half_sizes: np.ndarray, starts: np.ndarray, counts: np.ndarray,
+                 children: np.ndarray, parents: np.ndarray, levels: np.ndarray):
+        self.order = order
+        self.xs = np.ascontiguousarray(positions[:, 0])
+        self.ys = np.ascontiguousarray(positions[:, 1])
+        self.masses = masses
+        self.centers = centers
+        self.half_sizes = half_sizes
+        self.starts = starts
+        self.counts = counts
+        self.children = children
+        self.parents = parents
+        self.levels = levels
+        self.is_leaf = (children < 0).all(axis=1)
+        self.leaves = np.flatnonzero(self.is_leaf)
+        self.leaves = self.leaves[np.argsort(starts[self.leaves], kind='stable')]
+        self.leaf_lower, self.leaf_upper = self._leaf_bounds()
+        self.node_masses, self.centers_of_mass = self._compute_moments()
+        self._bounds = None
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'FlatQuadTree':
+        # Rebuilds a tree around existing arrays (e.g. shared memory) without recomputing anything
+        tree = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(tree, name, arrays[name])
+        tree._bounds = None
+        return tree
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    def _leaf_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        if len(self.masses) == 0:
+            return np.zeros((len(self.leaves), 2)), np.zeros((len(self.leaves), 2))
+        leaf_starts = self.starts[self.leaves]
+        lower = np.column_stack([np.minimum.reduceat(self.xs, leaf_starts), np.minimum.reduceat(self.ys, leaf_starts)])
+        upper = np.column_stack([np.maximum.reduceat(self.xs, leaf_starts), np.maximum.reduceat(self.ys, leaf_starts)])
+        return lower, upper
+
+    def covers(self, positions: np.ndarray, masses: Optional[np.ndarray] = None) -> bool:
+        """True if the tree was built over exactly these rows at these positions (and masses, if given)."""
+        return len(self.order) == len(positions) and \
+            np.array_equal(self.xs, positions[self.order, 0]) and np.array_equal(self.ys, positions[self.order, 1]) and \
+            (masses is None or np.array_equal(self.masses, masses[self.order]))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def build(cls, positions: np.ndarray, masses: np.ndarray,
+              capacity: int = PhysicsConfig.TREE_LEAF_CAPACITY,
+              max_depth: int = PhysicsConfig.TREE_MAX_DEPTH) -> 'FlatQuadTree':
+        count = len(masses)
+        if count == 0:
+            lower, size = np.zeros(2), 1.0
+        else:
+            lower = positions.min(axis=0)
+            size = max(float((positions.max(axis=0) - lower).max()), 1e-9) * (1 + 1e-9)
+        resolution = 1 << max_depth
+
+        cells = np.minimum(((positions - lower) / size * resolution).astype(np.int64), resolution - 1)
+        keys = morton_keys(cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        cells = cells[order]
+
+        starts, counts, levels, parents, quadrants = [0], [count], [0], [-1], [0]
+        frontier = np.array([0] if count > capacity else [], dtype=np.int64)
+        frontier_starts = np.array([0], dtype=np.int64)
+        frontier_counts = np.array([count], dtype=np.int64)
+
+        for level in range(1, max_depth + 1):
+            if len(frontier) == 0:
+                break
+            bodies = expand_ranges(frontier_starts, frontier_counts)
+            owner = np.repeat(frontier, frontier_counts)
+            prefixes = keys[bodies] >> np.uint64(2 * (max_depth - level))
+
+            # Each run of equal prefixes is one non-empty child cell
+            run_starts = np.flatnonzero(np.concatenate([[True], prefixes[1:] != prefixes[:-1]]))
+            run_counts = np.diff(np.concatenate([run_starts, [len(bodies)]]))
+            first = len(starts)
+            starts.extend(bodies[run_starts].tolist())
+            counts.extend(run_counts.tolist())
+            levels.extend([level] * len(run_starts))
+            parents.extend(owner[run_starts].tolist())
+            quadrants.extend((prefixes[run_starts] & np.uint64(3)).astype(np.int64).tolist())
+
+            split = np.flatnonzero(run_counts > capacity)
+            frontier = first + split
+            frontier_starts = bodies[run_starts[split]]
+            frontier_counts = run_counts[split]
+
+        starts = np.array(starts, dtype=np.int64)
+        counts = np.array(counts, dtype=np.int64)
+        levels = np.array(levels, dtype=np.int64)
+        parents = np.array(parents, dtype=np.int64)
+        quadrants = np.array(quadrants, dtype=np.int64)
+
+        children = np.full((len(starts), 4), -1, dtype=np.int64)
+        has_parent = parents >= 0
+        children[parents[has_parent], quadrants[has_parent]] = np.flatnonzero(has_parent)
+
+        cell_sizes = size / (1 << levels).astype(np.float64)
+        if count:
+            node_cells = cells[np.minimum(starts, count - 1)] >> (max_depth - levels)[:, None]
+        else:
+            node_cells = np.zeros((len(starts), 2), dtype=np.int64)
+        centers = lower + (node_cells + 0.5) * cell_sizes[:, None]
+
+        return cls(order, positions[order], masses[order], centers, cell_sizes / 2,
+                   starts, counts, children, parents, levels)
+
+    def _compute_moments(self) -> Tuple[np.ndarray, np.ndarray]:
+        node_count = self.node_count
+        node_masses = np.zeros(node_count)
+        weighted = np.zeros((node_count, 2))
+
+        # Leaves reduce their contiguous body runs, then each level folds into its parents bottom-up
+        if len(self.masses):
+            leaf_starts = self.starts[self.leaves]
+            node_masses[self.leaves] = np.add.reduceat(self.masses, leaf_starts)
+            weighted[self.leaves, 0] = np.add.reduceat(self.xs * self.masses, leaf_starts)
+            weighted[self.leaves, 1] = np.add.reduceat(self.ys * self.masses, leaf_starts)
+
+        for level in range(int(self.levels.max()) if node_count else 0, 0, -1):
+            nodes = np.flatnonzero(self.levels == level)
+            parents = self.parents[nodes]
+            np.add.at(node_masses, parents, node_masses[nodes])
+            np.add.at(weighted, parents, weighted[nodes])
+
+        centers_of_mass = np.divide(weighted, node_masses[:, None], out=self.centers.copy(),
+                                    where=node_masses[:, None] > 0)
+        return node_masses, centers_of_mass
+
+    def interaction_lists(self, theta: float, groups: Optional[slice] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Walks the tree iteratively for whole leaf groups at once.
+
+        Returns (group, node) pairs accepted as monopoles and (group, leaf) pairs that need direct summation.
+        """
+        groups = groups if groups is not None else slice(None)
+        group_nodes = self.leaves[groups]
+        group_starts = self.starts[group_nodes]
+        group_lower = self.leaf_lower[groups]
+        group_upper = self.leaf_upper[groups]
+
+        pair_groups = np.arange(len(group_nodes), dtype=np.int64)
+        pair_nodes = np.zeros(len(group_nodes), dtype=np.int64)
+        far_groups, far_nodes, near_groups, near_nodes = [], [], [], []
+
+        while len(pair_groups):
+            com = self.centers_of_mass[pair_nodes]
+            gap = np.maximum(np.maximum(group_lower[pair_groups] - com, com - group_upper[pair_groups]), 0)
+            distance = np.hypot(gap[:, 0], gap[:, 1])
+            # A node that contains the group is never accepted, whatever theta is, so no body attracts itself
+            node_starts = self.starts[pair_nodes]
+            contains = (node_starts <= group_starts[pair_groups]) & \
+                       (group_starts[pair_groups] < node_starts + self.counts[pair_nodes])
+            accepted = (2 * self.half_sizes[pair_nodes] < theta * distance) & ~contains
+
+            far_groups.append(pair_groups[accepted])
+            far_nodes.append(pair_nodes[accepted])
+
+            opened = ~accepted
+            leaf = opened & self.is_leaf[pair_nodes]
+            near_groups.append(pair_groups[leaf])
+            near_nodes.append(pair_nodes[leaf])
+
+            internal = opened & ~self.is_leaf[pair_nodes]
+            child_nodes = self.children[pair_nodes[internal]]
+            valid = child_nodes >= 0
+            pair_groups = np.repeat(pair_groups[internal], valid.sum(axis=1))
+            pair_nodes = child_nodes[valid]
+
+        return (np.concatenate(far_groups), np.concatenate(far_nodes),
+                np.concatenate(near_groups), np.concatenate(near_nodes))
+
+    def accelerations(self, G: float, theta: float = PhysicsConfig.THETA,
+                      softening: float = PhysicsConfig.SOFTENING, groups=None,
+                      batch_elements: int = PhysicsConfig.TREE_BATCH_ELEMENTS,
+                      return_nearest: bool = False, potentials: Optional[np.ndarray] = None):
+        """Accelerations for the bodies of ``groups`` (a slice or index array of leaves), in the order
+        given by ``group_bodies(groups)``; for a slice that is a contiguous run of tree order.
+
+        With ``return_nearest`` also returns each body's squared distance to the closest body it
+        interacted with directly (inf if none). ``potentials``, if given, is filled with the same
+        rows' softened specific potentials from the same interactions.
+        """
+        group_counts = self.counts[self.leaves[groups if groups is not None else slice(None)]]
+        body_count = int(group_counts.sum())
+        accelerations = np.zeros((body_count, 2))
+        nearest = np.full(body_count, np.inf) if return_nearest else None
+        if potentials is not None:
+            potentials[:] = 0.0
+        softening_sq = softening * softening
+
+        for rows, targets, source_x, source_y, source_masses, direct in self._interactions(theta, groups,
+                                                                                          batch_elements):
+            target_x, target_y = self.xs[targets], self.ys[targets]
+            self._accumulate(accelerations, rows, target_x, target_y, source_x, source_y, source_masses, softening_sq)
+            if (return_nearest and direct) or potentials is not None:
+                dx = source_x - target_x
+                dy = source_y - target_y
+                distances_sq = dx * dx + dy * dy
+                if return_nearest and direct:
+                    np.minimum.at(nearest, rows, distances_sq)
+                if potentials is not None:
+                    potentials -= np.bincount(rows, source_masses / np.sqrt(distances_sq + softening_sq),
+                                              minlength=body_count)
+
+        accelerations *= G
+        if potentials is not None:
+            potentials *= G
+        return (accelerations, nearest) if return_nearest else accelerations
+
+    def potentials(self, G: float, theta: float = PhysicsConfig.THETA, softening: float = PhysicsConfig.SOFTENING,
+                   batch_elements: int = PhysicsConfig.TREE_BATCH_ELEMENTS) -> np.ndarray:
+        """Softened specific potential of every body in tree order, from the same interactions as accelerations()."""
+        potentials = np.zeros(len(self.masses))
+        softening_sq = softening * softening
+        for rows, targets, source_x, source_y, source_masses, _ in self._interactions(theta, None, batch_elements):
+            dx = source_x - self.xs[targets]
+            dy = source_y - self.ys[targets]
+            potentials -= np.bincount(rows, source_masses / np.sqrt(dx * dx + dy * dy + softening_sq),
+                                      minlength=len(potentials))
+        return potentials * G
+
+    def _interactions(self, theta: float, groups, batch_elements: int):
+        """Yields batches of (output rows, target bodies, source x, source y, source masses, is_direct).
+
+        Rows index the concatenated bodies of ``groups``; targets and sources are tree positions.
+        """
+        groups = groups if groups is not None else slice(None)
+        group_nodes = self.leaves[groups]
+        group_starts = self.starts[group_nodes]
+        group_counts = self.counts[group_nodes]
+        group_offsets = np.cumsum(group_counts) - group_counts
+        if group_counts.sum() == 0:
+            return
+
+        far_groups, far_nodes, near_groups, near_nodes = self.interaction_lists(theta, groups)
+        com_x = np.ascontiguousarray(self.centers_of_mass[:, 0])
+        com_y = np.ascontiguousarray(self.centers_of_mass[:, 1])
+
+        # Monopole terms: every body of the group against the node's centre of mass
+        sizes = group_counts[far_groups]
+        for start, stop in batch_ranges(sizes, batch_elements):
+            targets = expand_ranges(group_starts[far_groups[start:stop]], sizes[start:stop])
+            rows = expand_ranges(group_offsets[far_groups[start:stop]], sizes[start:stop])
+            nodes = np.repeat(far_nodes[start:stop], sizes[start:stop])
+            yield rows, targets, com_x[nodes], com_y[nodes], self.node_masses[nodes], False
+
+        # Direct terms: every body of the group against every body of the leaf
+        target_counts = group_counts[near_groups]
+        source_counts = self.counts[near_nodes]
+        sizes = target_counts * source_counts
+        for start, stop in batch_ranges(sizes, batch_elements):
+            pair_sizes = sizes[start:stop]
+            pair = np.repeat(np.arange(start, stop), pair_sizes)
+            local = np.arange(int(pair_sizes.sum())) - np.repeat(np.cumsum(pair_sizes) - pair_sizes, pair_sizes)
+            offsets = local // source_counts[pair]
+            targets = group_starts[near_groups[pair]] + offsets
+            rows = group_offsets[near_groups[pair]] + offsets
+            sources = self.starts[near_nodes[pair]] + local % source_counts[pair]
+            distinct = targets != sources
+            targets, rows, sources = targets[distinct], rows[distinct], sources[distinct]
+            yield rows, targets, self.xs[sources], self.ys[sources], self.masses[sources], True
+
+    def group_bodies(self, groups) -> np.ndarray:
+        """Tree-order positions of the bodies in ``groups``, in the order accelerations() returns them."""
+        group_nodes = self.leaves[groups]
+        return expand_ranges(self.starts[group_nodes], self.counts[group_nodes])
+
+    def groups_containing(self, indices: np.ndarray) -> np.ndarray:
+        """Sorted leaf numbers holding the given bodies (original, unsorted indices)."""
+        tree_positions = np.empty(len(self.order), dtype=np.int64)
+        tree_positions[self.order] = np.arange(len(self.order))
+        return np.unique(np.searchsorted(self.starts[self.leaves], tree_positions[indices], side='right') - 1)
+
+    @property
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower and upper corners of the box around every body."""
+        lower, upper = self._node_bounds()
+        return lower[0], upper[0]
+
+    def query_box(self, lower, upper) -> np.ndarray:
+        """Original indices, ascending, of the bodies inside the box from ``lower`` to ``upper``."""
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+
+        def classify(node_lower, node_upper):
+            overlaps = (node_upper >= lower).all(axis=1) & (node_lower <= upper).all(axis=1)
+            contained = (node_lower >= lower).all(axis=1) & (node_upper <= upper).all(axis=1)
+            return overlaps, contained
+
+        def accept(xs, ys):
+            return (xs >= lower[0]) & (xs <= upper[0]) & (ys >= lower[1]) & (ys <= upper[1])
+
+        return np.sort(self.order[self._query(classify, accept)])
+
+    def query_radius(self, center, radius: float) -> np.ndarray:
+        """Original indices, ascending, of the bodies within ``radius`` of ``center``."""
+        return np.sort(self.order[self._query(*self._radius_tests(center, radius))])
+
+    def nearest(self, point, k: int = 1) -> np.ndarray:
+        """Original indices of the ``k`` bodies closest to ``point``, nearest first."""
+        count = len(self.masses)
+        k = min(k, count)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        point = np.asarray(point, dtype=np.float64)
+        lower, upper = self.bounds
+        extent = upper - lower
+        # Start at the radius holding k bodies at the average density, measured from the root's edge, and double
+        outside = float(np.hypot(*(np.clip(point, lower, upper) - point)))
+        radius = max(outside + np.sqrt(k * float(extent.prod()) / count), 1e-9 * max(float(extent.max()), 1.0))
+        while True:
+            rows = self._query(*self._radius_tests(point, radius))
+            if len(rows) >= k:
+                break
+            radius *= 2
+        distances = (self.xs[rows] - point[0]) ** 2 + (self.ys[rows] - point[1]) ** 2
+        return self.order[rows[np.argsort(distances, kind='stable')[:k]]]
+
+    @staticmethod
+    def _radius_tests(center, radius: float):
+        center = np.asarray(center, dtype=np.float64)
+        radius_sq = float(radius) ** 2
+
+        def classify(node_lower, node_upper):
+            closest = np.clip(center, node_lower, node_upper) - center
+            farthest = np.maximum(np.abs(node_lower - center), np.abs(node_upper - center))
+            return (closest ** 2).sum(axis=1) <= radius_sq, (farthest ** 2).sum(axis=1) <= radius_sq
+
+        def accept(xs, ys):
+            return (xs - center[0]) ** 2 + (ys - center[1]) ** 2 <= radius_sq
+
+        return classify, accept
+
+    def _query(self, classify, accept) -> np.ndarray:
+        # Walks down level by level: nodes wholly inside contribute their whole run, straddling leaves test each body
+        if len(self.masses) == 0:
+            return np.zeros(0, dtype=np.int64)
+        lower, upper = self._node_bounds()
+        found = []
+        nodes = np.zeros(1, dtype=np.int64)
+        while len(nodes):
+            overlaps, contained = classify(lower[nodes], upper[nodes])
+            whole = nodes[overlaps & contained]
+            found.append(expand_ranges(self.starts[whole], self.counts[whole]))
+            partial = nodes[overlaps & ~contained]
+            leaves = partial[self.is_leaf[partial]]
+            bodies = expand_ranges(self.starts[leaves], self.counts[leaves])
+            found.append(bodies[accept(self.xs[bodies], self.ys[bodies])])
+            children = self.children[partial[~self.is_leaf[partial]]].ravel()
+            nodes = children[children >= 0]
+        return np.concatenate(found)
+
+    def _node_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Tight boxes around each node's bodies, built on first query; refitted trees can outgrow their cells
+        if self._bounds is None:
+            lower = np.full((self.node_count, 2), np.inf)
+            upper = np.full((self.node_count, 2), -np.inf)
+            lower[self.leaves] = self.leaf_lower
+            upper[self.leaves] = self.leaf_upper
+            for level in range(int(self.levels.max()) if self.node_count else 0, 0, -1):
+                nodes = np.flatnonzero(self.levels == level)
+                np.minimum.at(lower, self.parents[nodes], lower[nodes])
+                np.maximum.at(upper, self.parents[nodes], upper[nodes])
+            self._bounds = (lower, upper)
+        return self._bounds
+
+    @staticmethod
+    def _accumulate(accelerations: np.ndarray, rows: np.ndarray, target_x: np.ndarray, target_y: np.ndarray,
+                    source_x: np.ndarray, source_y: np.ndarray, masses: np.ndarray, softening_sq: float) -> None:
+        dx = source_x - target_x
+        dy = source_y - target_y
+        weights = dx * dx
+        weights += dy * dy
+        weights += softening_sq
+        weights *= np.sqrt(weights)
+        np.divide(masses, weights, out=weights)
+        dx *= weights
+        dy *= weights
+        length = len(accelerations)
+        accelerations[:, 0] += np.bincount(rows, dx, minlength=length)
+        accelerations[:, 1] += np.bincount(rows, dy, minlength=length)
+
+    def unsort(self, values: np.ndarray) -> np.ndarray:
+        result = np.empty_like(values)
+        result[self.order] = values
+        return result
@@ -0,0 +1,179 @@
+import sys
+from multiprocessing import Pool, cpu_count
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+from grav_sim.src.core.physics.direct import direct_accelerations
+from grav_sim.src.core.physics.tree import FlatQuadTree
+
+# (shared memory block name, shape, dtype) for every published array, keyed by array name
+ArraySpecs = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class SharedArena:
+    """Named arrays in shared memory that are reused across frames and only reallocated to grow."""
+
+    def __init__(self):
+        self.blocks: Dict[str, SharedMemory] = {}
+        self.specs: ArraySpecs = {}
+
+    def allocate(self, key: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = self.blocks.get(key)
+        if block is None or block.size < size:
+            if block is not None:
+                self._release(block)
+            # Headroom so that small changes in N or node count do not reallocate every frame
+            block = SharedMemory(create=True, size=int(size * PhysicsConfig.SHARED_MEMORY_HEADROOM))
+            self.blocks[key] = block
+        self.specs[key] = (block.name, tuple(shape), dtype.str)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def publish(self, key: str, array: np.ndarray) -> None:
+        self.allocate(key, array.shape, array.dtype)[...] = array
+
+    def view(self, key: str) -> np.ndarray:
+        _, shape, dtype = self.specs[key]
+        return np.ndarray(shape, dtype=dtype, buffer=self.blocks[key].buf)
+
+    def close(self) -> None:
+        for block in self.blocks.values():
+            self._release(block)
+        self.blocks.clear()
+        self.specs.clear()
+
+    @staticmethod
+    def _release(block: SharedMemory) -> None:
+        try:
+            block.close()
+        except BufferError:
+            pass
+        block.unlink()
+
+
+# Blocks this worker process has mapped, keyed by shared memory name; attached once and reused
+_attached: Dict[str, SharedMemory] = {}
+
+
+def _attach(specs: ArraySpecs) -> Dict[str, np.ndarray]:
+    # specs lists every block the parent still owns, so anything else has been reallocated away
+    live = {name for name, _, _ in specs.values()}
+    for name in [name for name in _attached if name not in live]:
+        _attached.pop(name).close()
+
+    arrays = {}
+    for key, (name, shape, dtype) in specs.items():
+        block = _attached.get(name)
+        if block is None:
+            block = SharedMemory(name=name)
+            if sys.version_info < (3, 13):
+                # Only the owning process may unlink; stop the tracker from claiming the block for this worker
+                resource_tracker.unregister(block._name, "shared_memory")
+            _attached[name] = block
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return arrays
+
+
+def _direct_chunk(args: Tuple[ArraySpecs, float, float, bool, bool, int, int]) -> None:
+    specs, G, softening, return_nearest, with_potentials, start, stop = args
+    arrays = _attach(specs)
+    targets = arrays['targets'][start:stop]
+    potentials = arrays['potentials'][start:stop] if with_potentials else None
+    result = direct_accelerations(arrays['positions'], arrays['masses'], G, softening, targets=targets,
+                                  return_nearest=return_nearest, potentials=potentials)
+    if return_nearest:
+        arrays['accelerations'][start:stop], arrays['nearest'][start:stop] = result
+    else:
+        arrays['accelerations'][start:stop] = result
+
+
+def _tree_chunk(args: Tuple[ArraySpecs, float, float, float, bool, bool, int, int]) -> None:
+    specs, G, theta, softening, return_nearest, with_potentials, start, stop = args
+    arrays = _attach(specs)
+    tree = FlatQuadTree.from_arrays({name: arrays[f"tree_{name}"] for name in FlatQuadTree.ARRAY_FIELDS})
+    groups = arrays['groups']
+    # Output rows follow the concatenated bodies of the requested groups
+    first = int(tree.counts[tree.leaves[groups[:start]]].sum())
+    last = first + int(tree.counts[tree.leaves[groups[start:stop]]].sum())
+    potentials = arrays['potentials'][first:last] if with_potentials else None
+    result = tree.accelerations(G, theta, softening, groups=groups[start:stop], return_nearest=return_nearest,
+                                potentials=potentials)
+    if return_nearest:
+        accelerations, nearest = result
+        arrays['nearest'][first:first + len(nearest)] = nearest
+    else:
+        accelerations = result
+    arrays['accelerations'][first:first + len(accelerations)] = accelerations
+
+
+class WorkerPool:
+    """Long-lived process pool whose workers read particle and tree arrays from shared memory.
+
+    Each frame only array names and chunk bounds cross the process boundary; results are
+    written in place into a shared accelerations buffer.
+    """
+
+    def __init__(self, processes: Optional[int] = None):
+        self.processes = processes or cpu_count()
+        self.pool = Pool(processes=self.processes)
+        self.arena = SharedArena()
+
+    def direct_accelerations(self, positions: np.ndarray, masses: np.ndarray, G: float,
+                             softening: float = PhysicsConfig.SOFTENING,
+                             targets: Optional[np.ndarray] = None, return_nearest: bool = False,
+                             potentials: Optional[np.ndarray] = None):
+        if targets is None:
+            targets = np.arange(len(masses))
+        self.arena.publish('positions', positions)
+        self.arena.publish('masses', masses)
+        self.arena.publish('targets', targets)
+        self._allocate_results(len(targets))
+        specs = dict(self.arena.specs)
+
+        bounds = np.linspace(0, len(targets), min(len(targets), self.processes) + 1).astype(int)
+        self.pool.map(_direct_chunk, [(specs, G, softening, return_nearest, potentials is not None, start, stop)
+                                      for start, stop in zip(bounds[:-1], bounds[1:])])
+        return self._results(return_nearest, potentials)
+
+    def tree_accelerations(self, tree: FlatQuadTree, G: float, theta: float = PhysicsConfig.THETA,
+                           softening: float = PhysicsConfig.SOFTENING, groups: Optional[np.ndarray] = None,
+                           return_nearest: bool = False, potentials: Optional[np.ndarray] = None):
+        """Same contract as FlatQuadTree.accelerations, with ``groups`` an index array of leaves."""
+        if groups is None:
+            groups = np.arange(len(tree.leaves))
+        for key, array in tree.to_arrays().items():
+            self.arena.publish(f"tree_{key}", array)
+        self.arena.publish('groups', groups)
+        body_ends = np.cumsum(tree.counts[tree.leaves[groups]])
+        self._allocate_results(int(body_ends[-1]) if len(body_ends) else 0)
+        specs = dict(self.arena.specs)
+
+        # Contiguous runs of groups holding roughly the same number of bodies each
+        targets = np.linspace(0, body_ends[-1] if len(body_ends) else 0, self.processes + 1)[1:-1]
+        bounds = np.unique(np.concatenate([[0], np.searchsorted(body_ends, targets, side='right'), [len(groups)]]))
+        self.pool.map(_tree_chunk, [(specs, G, theta, softening, return_nearest, potentials is not None, start, stop)
+                                    for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start])
+        return self._results(return_nearest, potentials)
+
+    def _allocate_results(self, count: int) -> None:
+        self.arena.allocate('accelerations', (count, 2), np.float64)
+        self.arena.allocate('nearest', (count,), np.float64)
+        self.arena.allocate('potentials', (count,), np.float64)
+
+    def _results(self, return_nearest: bool, potentials: Optional[np.ndarray] = None):
+        accelerations = self.arena.view('accelerations').copy()
+        if potentials is not None:
+            potentials[:] = self.arena.view('potentials')
+        if return_nearest:
+            return accelerations, self.arena.view('nearest').copy()
+        return accelerations
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+        self.arena.close()
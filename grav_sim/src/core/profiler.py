@@ -0,0 +1,120 @@
+import json
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from grav_sim.src.config.settings import ProfilerConfig
+
+
+class RingBuffer:
+    """Keeps the last ``capacity`` samples in a preallocated array."""
+
+    def __init__(self, capacity: int):
+        self.samples = np.zeros(capacity, dtype=np.int64)
+        self.total = 0
+
+    def push(self, value: int) -> None:
+        self.samples[self.total % len(self.samples)] = value
+        self.total += 1
+
+    def values(self) -> np.ndarray:
+        return self.samples[:min(self.total, len(self.samples))]
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.record(self.name, time.perf_counter_ns() - self.start)
+
+
+class Profiler:
+    """Named timing spans, counters, gauges and rate-limited warnings for every phase of a frame.
+
+    ``with profiler.span("force"):`` records one sample in nanoseconds into that span's ring buffer.
+    """
+
+    def __init__(self, capacity: int = ProfilerConfig.HISTORY, enabled: bool = ProfilerConfig.ENABLED):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.hud_visible = ProfilerConfig.HUD_VISIBLE
+        self.spans: Dict[str, RingBuffer] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self._last_warning: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def record(self, name: str, nanoseconds: int) -> None:
+        if not self.enabled:
+            return
+        buffer = self.spans.get(name)
+        if buffer is None:
+            buffer = self.spans[name] = RingBuffer(self.capacity)
+        buffer.push(nanoseconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def warn(self, name: str, message: str, amount: int = 1) -> None:
+        """Counts the event and prints at most once per WARNING_INTERVAL, with how many were suppressed."""
+        self.count(name, amount)
+        now = time.monotonic()
+        if now - self._last_warning.get(name, -np.inf) < ProfilerConfig.WARNING_INTERVAL:
+            self._suppressed[name] = self._suppressed.get(name, 0) + amount
+            return
+        suppressed = self._suppressed.pop(name, 0)
+        self._last_warning[name] = now
+        suffix = f" ({suppressed} more since last report)" if suppressed else ""
+        print(f"{message}{suffix}", file=sys.stderr)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Milliseconds per span over the retained window: mean, p50, p95, p99 and max."""
+        summary = {}
+        # The physics thread may add spans while this runs
+        for name, buffer in list(self.spans.items()):
+            values = buffer.values()
+            if len(values) == 0:
+                continue
+            milliseconds = values / 1e6
+            p50, p95, p99 = np.percentile(milliseconds, (50, 95, 99))
+            summary[name] = {
+                "samples": int(buffer.total),
+                "mean": float(milliseconds.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(milliseconds.max()),
+            }
+        return summary
+
+    def export(self, path: Optional[str] = None) -> str:
+        path = path or ProfilerConfig.EXPORT_PATH
+        with open(path, "w") as file:
+            json.dump({"spans": self.summary(), "counters": dict(self.counters), "gauges": dict(self.gauges)},
+                      file, indent=2)
+        return path
+
+    def reset(self) -> None:
+        self.spans.clear()
+        self.counters.clear()
+        self.gauges.clear()
+
+
+# Shared by the engine, the game loop and the renderer
+profiler = Profiler()
@@ -0,0 +1,183 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from grav_sim.src.config.settings import RecordingConfig
+from grav_sim.src.core.profiler import profiler
+
+MAGIC = b"GRAVTRAJ"
+VERSION = 2
+# magic, version, header length, frames written, data offset, frames dropped, bodies overflowed
+PREAMBLE = struct.Struct("<8sIIQQQQ")
+FRAMES_OFFSET = 16
+LOSSES_OFFSET = 32
+
+
+def frame_dtype(slots: int, precision: str) -> np.dtype:
+    """One frame: per-frame scalars, then one fixed slot per particle id, alive flags last to keep floats aligned."""
+    return np.dtype([
+        ('step', '<i8'),
+        ('time', '<f8'),
+        ('wall_time', '<f8'),
+        ('count', '<i8'),
+        ('positions', precision, (slots, 2)),
+        ('velocities', precision, (slots, 2)),
+        ('masses', precision, (slots,)),
+        ('alive', 'u1', (slots,)),
+    ])
+
+
+class TrajectoryRecorder:
+    """Appends frames to a chunked, memory-mapped trajectory file from a background thread.
+
+    ``record`` copies the live arrays and hands them to a bounded queue without waiting; when the
+    writer falls behind, frames are dropped and counted instead of stalling the simulation.
+    Particle ids index fixed slots, so a body keeps its slot for the whole file; bodies whose id is
+    past the last slot are left out and counted in ``overflowed``. Both counts go into the preamble.
+    """
+
+    def __init__(self, path: str, slots: int, metadata: Optional[Dict] = None, interval: int = 1,
+                 chunk_frames: int = RecordingConfig.CHUNK_FRAMES, queue_frames: int = RecordingConfig.QUEUE_FRAMES,
+                 precision: str = RecordingConfig.PRECISION):
+        self.path = path
+        self.slots = slots
+        self.interval = max(1, int(interval))
+        self.chunk_frames = chunk_frames
+        self.dtype = frame_dtype(slots, np.dtype(precision).str)
+        self.frames = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.started = time.monotonic()
+
+        header = json.dumps({
+            "slots": slots,
+            "chunk_frames": chunk_frames,
+            "interval": self.interval,
+            "precision": np.dtype(precision).str,
+            "frame_bytes": self.dtype.itemsize,
+            "created": time.time(),
+            "metadata": metadata or {},
+        }).encode()
+        page = RecordingConfig.ALIGNMENT
+        self.data_offset = -(-(PREAMBLE.size + len(header)) // page) * page
+        with open(path, "wb") as file:
+            file.write(PREAMBLE.pack(MAGIC, VERSION, len(header), 0, self.data_offset, 0, 0))
+            file.write(header)
+            file.truncate(self.data_offset)
+
+        self._chunk = None
+        self._chunk_index = -1
+        self._queue = queue.Queue(maxsize=queue_frames)
+        self._writer = threading.Thread(target=self._write_loop, name="trajectory-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, engine) -> bool:
+        """Queues the engine's current state; returns False if the frame had to be dropped."""
+        particles = engine.particles
+        frame = (engine.steps, engine.time, time.monotonic() - self.started, particles.ids.copy(),
+                 particles.positions.copy(), particles.velocities.copy(), particles.masses.copy())
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+            profiler.count("recording_dropped")
+            return False
+        return True
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+        self._write_counts()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._write(*item)
+
+    def _write(self, step: int, sim_time: float, wall_time: float, ids: np.ndarray, positions: np.ndarray,
+               velocities: np.ndarray, masses: np.ndarray) -> None:
+        chunk_index, row = divmod(self.frames, self.chunk_frames)
+        if chunk_index != self._chunk_index:
+            self._map_chunk(chunk_index)
+
+        inside = ids < self.slots
+        if not inside.all():
+            # Ids created after the file was sized; they cannot be placed without rewriting every frame
+            if not self.overflowed:
+                profiler.warn("recording_overflowed", f"Recording {self.path}: bodies created after it started "
+                                                      f"have no slot and are left out of the file")
+            self.overflowed += int((~inside).sum())
+            ids, positions, velocities, masses = ids[inside], positions[inside], velocities[inside], masses[inside]
+
+        frame = self._chunk[row]
+        frame['step'] = step
+        frame['time'] = sim_time
+        frame['wall_time'] = wall_time
+        frame['count'] = len(ids)
+        frame['alive'][:] = 0
+        frame['alive'][ids] = 1
+        frame['positions'][ids] = positions
+        frame['velocities'][ids] = velocities
+        frame['masses'][ids] = masses
+        self.frames += 1
+
+    def _map_chunk(self, chunk_index: int) -> None:
+        if self._chunk is not None:
+            self._chunk.flush()
+            # Keep the preamble current so a crashed run is still readable up to here
+            self._write_counts()
+        chunk_bytes = self.chunk_frames * self.dtype.itemsize
+        offset = self.data_offset + chunk_index * chunk_bytes
+        with open(self.path, "r+b") as file:
+            file.truncate(offset + chunk_bytes)
+        self._chunk = np.memmap(self.path, dtype=self.dtype, mode="r+", offset=offset, shape=(self.chunk_frames,))
+        self._chunk_index = chunk_index
+
+    def _write_counts(self) -> None:
+        with open(self.path, "r+b") as file:
+            file.seek(FRAMES_OFFSET)
+            file.write(struct.pack("<Q", self.frames))
+            file.seek(LOSSES_OFFSET)
+            file.write(struct.pack("<QQ", self.dropped, self.overflowed))
+
+
+class TrajectoryReader:
+    """Read-only memory map over a trajectory file; ``frames[i]`` is frame i without loading the rest.
+
+    ``dropped`` and ``overflowed`` are the recorder's counts of frames and body positions it lost.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            magic, version, header_length, frames, data_offset, self.dropped, self.overflowed = \
+                PREAMBLE.unpack(file.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a trajectory file")
+            if version != VERSION:
+                raise ValueError(f"Unsupported trajectory version {version}")
+            self.header = json.loads(file.read(header_length))
+
+        self.metadata = self.header["metadata"]
+        self.slots = self.header["slots"]
+        self.dtype = frame_dtype(self.slots, self.header["precision"])
+        # Trailing frames of the last chunk are preallocated but unwritten
+        available = (os.path.getsize(path) - data_offset) // self.dtype.itemsize
+        self.frames = np.memmap(path, dtype=self.dtype, mode="r", offset=data_offset,
+                                shape=(min(frames, available),)) if frames else np.zeros(0, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def alive_ids(self, index: int) -> np.ndarray:
+        return np.flatnonzero(self.frames[index]['alive'])
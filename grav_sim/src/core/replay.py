@@ -0,0 +1,106 @@
+import numpy as np
+
+from grav_sim.src.config.settings import EntityConfig
+from grav_sim.src.core.entity.views import EntityMap, EntityViews
+from grav_sim.src.core.physics.particles import ParticleStore
+from grav_sim.src.core.recording import TrajectoryReader
+
+
+class ReplayPlayer:
+    """Plays a recorded trajectory back without running any physics.
+
+    The cursor is a simulated time, located among the frames' stored timestamps by binary search,
+    so seeking is O(log frames) and gaps left by dropped frames do not change the playback rate;
+    between stored frames positions are interpolated linearly. ``particles`` and ``entities`` have
+    the same shape as PhysicsEngine's, so the renderer and camera can draw a replay directly.
+    """
+
+    def __init__(self, path: str):
+        self.reader = TrajectoryReader(path)
+        metadata = self.reader.metadata
+        slots = self.reader.slots
+
+        # Appearance is not stored per frame; it comes from the bodies present when recording started
+        self.densities = np.full(slots, EntityConfig.DEFAULT_DENSITY, dtype=np.float64)
+        self.colors = np.full((slots, 3), 255, dtype=np.uint8)
+        ids = np.array(metadata.get("ids", []), dtype=np.int64)
+        if len(ids):
+            inside = ids < slots
+            self.densities[ids[inside]] = np.array(metadata["densities"])[inside]
+            self.colors[ids[inside]] = np.array(metadata["colors"])[inside]
+        self.names = {int(particle_id): name for particle_id, name in metadata.get("names", {}).items()}
+
+        frames = self.reader.frames
+        # Frames need not be evenly spaced: the recorder drops frames when it falls behind, so play back by timestamp
+        self.times = np.asarray(frames['time'], dtype=np.float64)
+        self.current_time = float(self.times[0]) if len(frames) else 0.0
+        self.playing = True
+        self.interpolate = True
+        self.particles = ParticleStore()
+        self.entities = EntityMap(self.particles)
+        self._views = EntityViews()
+        if len(frames):
+            self.seek(0)
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    @property
+    def time(self) -> float:
+        return self.current_time
+
+    @property
+    def frame(self) -> int:
+        """Index of the last stored frame at or before the current time."""
+        return max(int(np.searchsorted(self.times, self.current_time, side="right")) - 1, 0)
+
+    def seek(self, frame: int) -> None:
+        if len(self) == 0:
+            return
+        self.seek_time(self.times[min(max(int(frame), 0), len(self) - 1)])
+
+    def seek_time(self, sim_time: float) -> None:
+        if len(self) == 0:
+            return
+        self.current_time = min(max(float(sim_time), self.times[0]), self.times[-1])
+        self._load()
+
+    def step(self, frames: int) -> None:
+        self.seek(self.frame + frames)
+
+    def advance(self, amount: float) -> None:
+        """Moves forward by ``amount`` of simulated time, the same amount a live frame would cover."""
+        if self.playing and len(self) > 1:
+            self.seek_time(self.current_time + amount)
+
+    def toggle_playing(self) -> None:
+        self.playing = not self.playing
+
+    def toggle_interpolation(self) -> None:
+        self.interpolate = not self.interpolate
+        self.seek_time(self.current_time)
+
+    def _load(self) -> None:
+        frames = self.reader.frames
+        times = self.times
+        index = self.frame
+        fraction = 0.0
+        if index + 1 < len(frames) and times[index + 1] > times[index]:
+            fraction = (self.current_time - times[index]) / (times[index + 1] - times[index])
+        frame = frames[index]
+        alive = frame['alive'].astype(bool)
+        ids = np.flatnonzero(alive)
+        positions = frame['positions'][ids].astype(np.float64)
+
+        if self.interpolate and fraction > 0 and index + 1 < len(frames):
+            following = frames[index + 1]
+            # Bodies merged away before the next frame stay where they were last seen
+            present = following['alive'][ids].astype(bool)
+            target = following['positions'][ids[present]]
+            positions[present] += fraction * (target - positions[present])
+
+        self.particles = ParticleStore.from_arrays(ids, positions, frame['velocities'][ids].astype(np.float64),
+                                                   frame['masses'][ids].astype(np.float64), self.densities[ids],
+                                                   self.colors[ids], self.names)
+
+        self.entities = self._views.bind(self.particles)
@@ -0,0 +1,202 @@
+import math
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import BoardConfig, PhysicsConfig, ScenarioConfig
+from grav_sim.src.core.physics.particles import ParticleStore
+
+CENTER = np.array([BoardConfig.WIDTH / 2, BoardConfig.HEIGHT / 2])
+SUN_COLOR = (255, 215, 0)
+# Share of a Plummer sphere's mass inside ten scale radii; sampling stops there so no body starts absurdly far out
+PLUMMER_CUTOFF = 1000.0 / 101.0 ** 1.5
+
+
+class Scenario:
+    """A named set of initial conditions; nothing is generated until ``build`` is called.
+
+    ``factory(bodies, seed)`` returns a fresh ParticleStore, so building twice never shares state.
+    ``bodies`` is the default body count, or None for scenarios with a fixed cast.
+    """
+
+    def __init__(self, name: str, factory: Callable[[int, int], ParticleStore], bodies: Optional[int] = None,
+                 description: str = ""):
+        self.name = name
+        self.factory = factory
+        self.bodies = bodies
+        self.description = description
+
+    def build(self, bodies: Optional[int] = None, seed: Optional[int] = None) -> ParticleStore:
+        return self.factory(bodies if bodies is not None else self.bodies,
+                            ScenarioConfig.SEED if seed is None else seed)
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def register_scenario(name: str, factory: Callable[[int, int], ParticleStore], bodies: Optional[int] = None,
+                      description: str = "") -> Scenario:
+    scenario = Scenario(name, factory, bodies, description)
+    SCENARIOS[name] = scenario
+    return scenario
+
+
+def build_scenario(name: str, bodies: Optional[int] = None, seed: Optional[int] = None) -> ParticleStore:
+    if name not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {name}")
+    return SCENARIOS[name].build(bodies, seed)
+
+
+def _orbits(rng: np.random.Generator, centers: np.ndarray, center_velocities: np.ndarray, central_masses,
+            radii: np.ndarray, speed: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions and velocities at random phases on orbits of ``radii``, moving at ``speed`` times circular speed."""
+    angles = rng.uniform(0.0, 2 * math.pi, len(radii))
+    directions = np.column_stack((np.cos(angles), np.sin(angles)))
+    positions = centers + radii[:, None] * directions
+    speeds = np.sqrt(PhysicsConfig.GRAVITY_CONSTANT * central_masses / radii) * speed
+    velocities = center_velocities + speeds[:, None] * np.column_stack((-directions[:, 1], directions[:, 0]))
+    return positions, velocities
+
+
+def _isotropic(rng: np.random.Generator, lengths: np.ndarray) -> np.ndarray:
+    """Vectors of ``lengths`` in uniformly random 3D directions, projected onto the plane."""
+    z = rng.uniform(-1.0, 1.0, len(lengths))
+    angles = rng.uniform(0.0, 2 * math.pi, len(lengths))
+    planar = lengths * np.sqrt(1.0 - z * z)
+    return np.column_stack((planar * np.cos(angles), planar * np.sin(angles)))
+
+
+def _store(positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, colors: np.ndarray,
+           names: Sequence[str] = ()) -> ParticleStore:
+    # Only the first len(names) rows are named; the rest go by their id, which keeps large N cheap
+    store = ParticleStore()
+    store.extend(positions, velocities, masses, np.full(len(masses), ScenarioConfig.DENSITY), colors, list(names))
+    return store
+
+
+def _with_star(star_mass: float, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray,
+               colors: np.ndarray, names: Sequence[str] = ()) -> ParticleStore:
+    return _store(np.vstack((CENTER, positions)), np.vstack(((0.0, 0.0), velocities)),
+                  np.concatenate(([star_mass], masses)), np.vstack((SUN_COLOR, colors)), ["Sun", *names])
+
+
+def orbiting_disk(count: int, seed: int = ScenarioConfig.SEED, star_mass: float = 333000.0, inner: float = 10000.0,
+                  outer: float = 80000.0, max_mass: float = 1000.0, speed: float = 0.7) -> ParticleStore:
+    """A star with ``count - 1`` bodies on sub-circular orbits between ``inner`` and ``outer``."""
+    rng = np.random.default_rng(seed)
+    others = max(count - 1, 0)
+    radii = rng.uniform(inner, outer, others)
+    positions, velocities = _orbits(rng, CENTER, np.zeros(2), star_mass, radii, speed)
+    masses = rng.uniform(10.0, max_mass, others)
+    colors = rng.integers(50, 256, (others, 3))
+    return _with_star(star_mass, positions, velocities, masses, colors)
+
+
+def plummer_sphere(count: int, seed: int = ScenarioConfig.SEED, total_mass: float = 1e6,
+                   scale: float = 15000.0) -> ParticleStore:
+    """Equal-mass bodies drawn from a Plummer sphere of ``scale`` radius, seen projected onto the plane.
+
+    Speeds follow the sphere's own distribution function (Aarseth, Henon & Wielen 1974).
+    """
+    rng = np.random.default_rng(seed)
+    enclosed = np.maximum(rng.uniform(0.0, PLUMMER_CUTOFF, count), 1e-12)
+    radii = scale / np.sqrt(enclosed ** (-2.0 / 3.0) - 1.0)
+    positions = CENTER + _isotropic(rng, radii)
+
+    # Fraction of the local escape speed, by rejection against q^2 (1 - q^2)^3.5, whose peak is below 0.1
+    fractions = np.empty(count)
+    pending = np.arange(count)
+    while len(pending):
+        candidates = rng.uniform(0.0, 1.0, len(pending))
+        accepted = rng.uniform(0.0, 0.1, len(pending)) < candidates ** 2 * (1.0 - candidates ** 2) ** 3.5
+        fractions[pending[accepted]] = candidates[accepted]
+        pending = pending[~accepted]
+    escape = np.sqrt(2.0 * PhysicsConfig.GRAVITY_CONSTANT * total_mass / scale) * (1.0 + (radii / scale) ** 2) ** -0.25
+    velocities = _isotropic(rng, fractions * escape)
+    if count:
+        # Sampling leaves some net momentum; remove it so the cluster does not drift
+        velocities -= velocities.mean(axis=0)
+
+    masses = np.full(count, total_mass / max(count, 1))
+    warmth = rng.integers(150, 256, count)
+    colors = np.column_stack((np.full(count, 255), warmth, warmth * 0.8 + 40))
+    return _store(positions, velocities, masses, colors)
+
+
+def uniform_cloud(count: int, seed: int = ScenarioConfig.SEED, radius: float = 40000.0, total_mass: float = 1e6,
+                  spin: float = 0.3, dispersion: float = 0.1) -> ParticleStore:
+    """Equal-mass bodies spread evenly over a disc, turning at ``spin`` times circular speed with random jitter."""
+    rng = np.random.default_rng(seed)
+    distances = radius * np.sqrt(rng.uniform(0.0, 1.0, count))
+    angles = rng.uniform(0.0, 2 * math.pi, count)
+    directions = np.column_stack((np.cos(angles), np.sin(angles)))
+    positions = CENTER + distances[:, None] * directions
+
+    # Circular speed inside an even disc, counting only the mass within each body's radius
+    circular = np.sqrt(PhysicsConfig.GRAVITY_CONSTANT * total_mass * distances) / radius
+    typical = math.sqrt(PhysicsConfig.GRAVITY_CONSTANT * total_mass / radius)
+    velocities = (spin * circular)[:, None] * np.column_stack((-directions[:, 1], directions[:, 0]))
+    velocities += rng.normal(0.0, dispersion * typical, (count, 2))
+    if count:
+        velocities -= velocities.mean(axis=0)
+
+    masses = np.full(count, total_mass / max(count, 1))
+    colors = rng.integers(120, 256, (count, 3))
+    return _store(positions, velocities, masses, colors)
+
+
+def hierarchical_system(count: int, seed: int = ScenarioConfig.SEED, star_mass: float = 333000.0,
+                        inner: float = 15000.0, outer: float = 90000.0, moon_share: float = 0.01) -> ParticleStore:
+    """A star, about sqrt(count) planets, and moons shared evenly between them inside each planet's Hill sphere.
+
+    Each planet's moons together weigh ``moon_share`` of it, so the planets still dominate their moons' orbits.
+    """
+    rng = np.random.default_rng(seed)
+    others = max(count - 1, 0)
+    planets = min(others, max(1, int(math.sqrt(others))))
+    moons = others - planets
+
+    planet_radii = rng.uniform(inner, outer, planets)
+    planet_masses = rng.uniform(200.0, 2000.0, planets)
+    planet_positions, planet_velocities = _orbits(rng, CENTER, np.zeros(2), star_mass, planet_radii)
+    planet_colors = rng.integers(50, 256, (planets, 3))
+
+    parents = np.arange(moons) % max(planets, 1)
+    siblings = np.bincount(parents, minlength=planets)[parents]
+    hill = planet_radii[parents] * np.cbrt(planet_masses[parents] / (3.0 * star_mass))
+    moon_positions, moon_velocities = _orbits(rng, planet_positions[parents], planet_velocities[parents],
+                                              planet_masses[parents], hill * rng.uniform(0.1, 0.4, moons))
+    moon_masses = planet_masses[parents] * moon_share * rng.uniform(0.5, 1.5, moons) / siblings
+    moon_colors = np.repeat(rng.integers(150, 221, (moons, 1)), 3, axis=1)
+
+    return _with_star(star_mass, np.vstack((planet_positions, moon_positions)),
+                      np.vstack((planet_velocities, moon_velocities)), np.concatenate((planet_masses, moon_masses)),
+                      np.vstack((planet_colors, moon_colors)))
+
+
+def solar_system(seed: int = ScenarioConfig.SEED) -> ParticleStore:
+    """A sun, a planet and its moon."""
+    rng = np.random.default_rng(seed)
+    sun_mass, earth_mass = 33300.0, 1000.0
+    earth_position, earth_velocity = _orbits(rng, CENTER, np.zeros(2), sun_mass, np.array([40000.0]), 0.7)
+    moon_position, moon_velocity = _orbits(rng, earth_position, earth_velocity, earth_mass, np.array([2000.0]), 0.7)
+    return _with_star(sun_mass, np.vstack((earth_position, moon_position)),
+                      np.vstack((earth_velocity, moon_velocity)), np.array([earth_mass, 12.0]),
+                      np.array([(0, 0, 255), (200, 200, 200)]), ["Urath", "Woon"])
+
+
+def collision_test(seed: int = ScenarioConfig.SEED) -> ParticleStore:
+    """Three heavy bodies on crossing orbits close to a sun; unnamed, they go by Entity_1 to Entity_3."""
+    rng = np.random.default_rng(seed)
+    sun_mass = 100000.0
+    positions, velocities = _orbits(rng, CENTER, np.zeros(2), sun_mass, np.array([2000.0, 2500.0, 3000.0]), 0.7)
+    return _with_star(sun_mass, positions, velocities, np.full(3, 1000.0),
+                      np.array([(255, 0, 0), (0, 255, 0), (0, 0, 255)]))
+
+
+register_scenario("SOLAR_SYSTEM", lambda bodies, seed: solar_system(seed), description="A sun, a planet and a moon")
+register_scenario("RANDOM_GRAVITY", orbiting_disk, 1000, "A star with a disk of orbiting bodies")
+register_scenario("COLLISION_TEST", lambda bodies, seed: collision_test(seed), description="Bodies set to collide")
+register_scenario("PLUMMER_SPHERE", plummer_sphere, 5000, "A star cluster in equilibrium")
+register_scenario("UNIFORM_CLOUD", uniform_cloud, 5000, "A slowly turning cloud that collapses")
+register_scenario("HIERARCHICAL", hierarchical_system, 2000, "A star with planets, each with moons")
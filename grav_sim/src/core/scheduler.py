@@ -0,0 +1,74 @@
+from grav_sim.src.config.settings import PhysicsConfig, SimulationConfig
+from grav_sim.src.core.profiler import profiler
+
+
+class FrameScheduler:
+    """Fixed-timestep accumulator that decides how many physics steps to run each frame.
+
+    Wall time accrues simulated time at ``time_scale * steps_per_second * timestep`` per second,
+    capped at ``max_steps_per_second``; every step advances exactly ``timestep``. The number of
+    steps per frame is limited to what fits the frame's budget at the measured cost of a step,
+    and time that does not fit is dropped, so a slow machine simulates less rather than taking
+    larger, less stable steps.
+    """
+
+    def __init__(self, timestep: float = PhysicsConfig.TIMESTEP,
+                 steps_per_second: float = SimulationConfig.STEPS_PER_SECOND,
+                 max_steps_per_second: float = SimulationConfig.MAX_STEPS_PER_SECOND,
+                 target_fps: float = SimulationConfig.TARGET_FPS, budget: float = SimulationConfig.PHYSICS_BUDGET):
+        self.timestep = timestep
+        self.steps_per_second = steps_per_second
+        self.max_steps_per_second = max_steps_per_second
+        self.target_fps = target_fps
+        self.budget = budget
+        # Simulated time owed but not yet stepped
+        self.accumulator = 0.0
+        # Smoothed wall seconds per step; None until the first measurement
+        self.step_cost = None
+        self.dropped = 0
+
+    @property
+    def frame_time(self) -> float:
+        return 1.0 / self.target_fps
+
+    @property
+    def max_time_scale(self) -> float:
+        """Time scale at which ``max_steps_per_second`` is reached; anything faster simulates no more."""
+        return self.max_steps_per_second / self.steps_per_second
+
+    def simulated_rate(self, time_scale: float) -> float:
+        steps = min(time_scale * self.steps_per_second, self.max_steps_per_second)
+        return max(steps, 0.0) * self.timestep
+
+    def affordable_steps(self) -> int:
+        if self.step_cost is None:
+            return 1
+        return max(1, int(self.budget * self.frame_time / self.step_cost))
+
+    def steps_due(self, elapsed: float, time_scale: float) -> int:
+        """Accrues ``elapsed`` wall seconds and returns how many fixed steps to run now."""
+        # A stall (window drag, breakpoint) must not turn into a burst of catch-up steps
+        elapsed = min(elapsed, 4 * self.frame_time)
+        self.accumulator += elapsed * self.simulated_rate(time_scale)
+        owed = int(self.accumulator // self.timestep)
+        steps = min(owed, self.affordable_steps())
+        if steps < owed:
+            self.dropped += owed - steps
+            profiler.count("steps_dropped", owed - steps)
+            self.accumulator -= (owed - steps) * self.timestep
+        self.accumulator -= steps * self.timestep
+        profiler.gauge("steps_per_frame", steps)
+        return steps
+
+    def record(self, steps: int, seconds: float) -> None:
+        """Feeds back how long ``steps`` steps took so the next budget uses the current cost."""
+        if steps <= 0:
+            return
+        cost = seconds / steps
+        if self.step_cost is None:
+            self.step_cost = cost
+        else:
+            self.step_cost += SimulationConfig.COST_SMOOTHING * (cost - self.step_cost)
+
+    def reset(self) -> None:
+        self.accumulator = 0.0
@@ -0,0 +1,223 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from grav_sim.src.config.settings import PhysicsConfig
+from grav_sim.src.core.entity.views import EntityMap, EntityViews
+from grav_sim.src.core.physics.particles import ParticleStore
+from grav_sim.src.core.physics.physics import PhysicsEngine
+from grav_sim.src.core.physics.tree import FlatQuadTree
+from grav_sim.src.core.profiler import profiler
+from grav_sim.src.core.scheduler import FrameScheduler
+
+
+class StateSnapshot:
+    """An immutable copy of the engine's particles after one completed step.
+
+    Per-step arrays are copied every time; the rest is shared between snapshots until the store's version changes.
+    """
+
+    __slots__ = ("steps", "time", "published", "positions", "old_positions", "velocities", "shared", "index",
+                 "displacement")
+
+    def __init__(self, steps: int, sim_time: float, published: float, positions: np.ndarray,
+                 old_positions: np.ndarray, velocities: np.ndarray, shared: Tuple,
+                 index: Optional[FlatQuadTree] = None):
+        self.steps = steps
+        self.time = sim_time
+        self.published = published
+        self.positions = positions
+        self.old_positions = old_positions
+        self.velocities = velocities
+        # (store key, ids, masses, densities, colors, names, ids by name, next id)
+        self.shared = shared
+        # The engine's spatial index when it was built over exactly these positions
+        self.index = index
+        # Largest distance a body moves from the previous snapshot to this one, filled in on first use
+        self.displacement = None
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.shared[1]
+
+    def store(self, positions: Optional[np.ndarray] = None) -> ParticleStore:
+        _, ids, masses, densities, colors, names, ids_by_name, next_id = self.shared
+        return ParticleStore.from_arrays(ids, self.positions if positions is None else positions, self.velocities,
+                                         masses, densities, colors, names, old_positions=self.old_positions,
+                                         next_id=next_id, ids_by_name=ids_by_name)
+
+
+class SimulationThread:
+    """Steps a PhysicsEngine on a background thread and publishes every completed state.
+
+    The latest two snapshots are published together as one tuple, so swapping them is a single
+    reference assignment and ``view`` reads a consistent pair without taking a lock. Anything that
+    mutates the engine goes through ``submit`` and runs on the physics thread between steps.
+    Steps are paced by a FrameScheduler that has the whole frame to itself.
+    """
+
+    def __init__(self, engine: PhysicsEngine, time_scale: float = PhysicsConfig.DEFAULT_TIME_SCALE,
+                 scheduler: Optional[FrameScheduler] = None):
+        self.engine = engine
+        self.time_scale = time_scale
+        self.scheduler = scheduler if scheduler is not None else FrameScheduler(budget=1.0)
+        self.error: Optional[BaseException] = None
+        self._commands = queue.Queue()
+        # Guards the hand-over between queueing commands and running them inline once the thread has stopped
+        self._lock = threading.Lock()
+        self._accepting = False
+        self._stop = threading.Event()
+        self._shared = None
+        self._states = (None, None)
+        self._views = EntityViews()
+        self.view_index: Optional[FlatQuadTree] = None
+        self.view_margin = 0.0
+        self._thread = threading.Thread(target=self._run, name="physics", daemon=True)
+        self._publish()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self) -> None:
+        self._accepting = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def submit(self, command: Callable[[PhysicsEngine], object]) -> Future:
+        """Runs ``command(engine)`` on the physics thread before its next step."""
+        future = Future()
+        with self._lock:
+            if self._accepting:
+                self._commands.put((command, future))
+                return future
+        # Not started yet, or stopped: nothing else touches the engine, so run it here
+        self._execute(command, future)
+        return future
+
+    def call(self, command: Callable[[PhysicsEngine], object]):
+        return self.submit(command).result()
+
+    def replace_engine(self, engine: PhysicsEngine) -> None:
+        def replace(_):
+            self.engine = engine
+            # A fresh store can reuse the old one's id and version, so never share arrays across engines
+            self._shared = None
+            self._states = (None, None)
+            self._publish()
+        self.call(replace)
+
+    def latest(self) -> Optional[StateSnapshot]:
+        return self._states[1]
+
+    def view(self, now: Optional[float] = None) -> Tuple[ParticleStore, EntityMap]:
+        """Particles and entity views interpolated between the two most recent snapshots.
+
+        The display runs one physics step behind and blends towards the newest state over the
+        time it took to produce it, so motion stays smooth when render and physics rates differ.
+        Also sets ``view_index``, a spatial index over the newest state, and ``view_margin``, how far
+        displayed bodies may be from the positions it indexes.
+        """
+        previous, latest = self._states
+        positions = latest.positions
+        self.view_index, self.view_margin = latest.index, 0.0
+        if previous is not None and latest.published > previous.published:
+            now = time.perf_counter() if now is None else now
+            fraction = (now - latest.published) / (latest.published - previous.published)
+            if fraction < 1.0:
+                positions = self._interpolate(previous, latest, max(fraction, 0.0))
+                self.view_margin = self._displacement(previous, latest)
+                if not np.isfinite(self.view_margin):
+                    self.view_index = None
+        store = latest.store(positions)
+        return store, self._views.bind(store)
+
+    @staticmethod
+    def _displacement(previous: StateSnapshot, latest: StateSnapshot) -> float:
+        if latest.displacement is None:
+            if previous.shared is latest.shared and len(latest.positions):
+                moved = latest.positions - previous.positions
+                latest.displacement = float(np.sqrt((moved * moved).sum(axis=1).max()))
+            else:
+                latest.displacement = 0.0 if previous.shared is latest.shared else np.inf
+        return latest.displacement
+
+    def _interpolate(self, previous: StateSnapshot, latest: StateSnapshot, fraction: float) -> np.ndarray:
+        if previous.shared is latest.shared:
+            return previous.positions + fraction * (latest.positions - previous.positions)
+        # Rows changed between the two; ids are ascending in both, so match them by search
+        positions = latest.positions.copy()
+        rows = np.searchsorted(previous.ids, latest.ids)
+        rows = np.minimum(rows, max(len(previous.ids) - 1, 0))
+        present = previous.ids[rows] == latest.ids if len(previous.ids) else np.zeros(len(latest.ids), dtype=bool)
+        start = previous.positions[rows[present]]
+        positions[present] = start + fraction * (positions[present] - start)
+        return positions
+
+    def _run(self) -> None:
+        scheduler = self.scheduler
+        last = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                changed = self._drain()
+                now = time.perf_counter()
+                steps = scheduler.steps_due(now - last, self.time_scale)
+                last = now
+                if steps:
+                    for _ in range(steps):
+                        with profiler.span("physics_step"):
+                            self.engine.update(scheduler.timestep)
+                    scheduler.record(steps, time.perf_counter() - now)
+                    self._publish()
+                elif changed:
+                    # Paused, but commands such as adding a body still have to show up
+                    self._publish()
+                delay = scheduler.frame_time - (time.perf_counter() - now)
+                if delay > 0:
+                    self._stop.wait(delay)
+        except BaseException as error:
+            self.error = error
+        finally:
+            with self._lock:
+                self._accepting = False
+                self._drain()
+
+    def _drain(self) -> int:
+        executed = 0
+        while True:
+            try:
+                command, future = self._commands.get_nowait()
+            except queue.Empty:
+                return executed
+            self._execute(command, future)
+            executed += 1
+
+    def _execute(self, command: Callable[[PhysicsEngine], object], future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(command(self.engine))
+        except BaseException as error:
+            future.set_exception(error)
+
+    def _publish(self) -> None:
+        engine = self.engine
+        particles = engine.particles
+        key = (id(particles), particles.version)
+        if self._shared is None or self._shared[0] != key:
+            names = dict(particles.names)
+            self._shared = (key, particles.ids.copy(), particles.masses.copy(), particles.densities.copy(),
+                            particles.colors.copy(), names, {name: particle_id for particle_id, name in names.items()},
+                            particles.next_id)
+        snapshot = StateSnapshot(engine.steps, engine.time, time.perf_counter(), particles.positions.copy(),
+                                 particles.old_positions.copy(), particles.velocities.copy(), self._shared,
+                                 engine.spatial_index(build=False))
+        self._states = (self._states[1], snapshot)
@@ -1,73 +1,145 @@
+import os
+import time
+from typing import Optional
+
 import pygame
 
-from grav_sim.src.config.settings import WindowConfig, PhysicsConfig
+from grav_sim.src.config.settings import CheckpointConfig, WindowConfig, PhysicsConfig, ScenarioConfig, \
+    SimulationConfig
+from grav_sim.src.core.checkpoint import load_checkpoint, save_checkpoint
 from grav_sim.src.core.physics.physics import PhysicsEngine
-from grav_sim.src.core.physics.utils import create_random_entities, create_default_entities
+from grav_sim.src.core.physics.workers import WorkerPool
+from grav_sim.src.core.profiler import profiler
+from grav_sim.src.core.replay import ReplayPlayer
+from grav_sim.src.core.scenarios import build_scenario
+from grav_sim.src.core.scheduler import FrameScheduler
+from grav_sim.src.core.simulation import SimulationThread
 from grav_sim.src.graphics.camera import Camera
 from grav_sim.src.graphics.renderer import Renderer
 from grav_sim.src.input.keyboard_handler import KeyboardHandler
 from grav_sim.src.input.mouse_handler import MouseHandler
 import pygame_menu
 
-from grav_sim.src.menu.option_menu import OptionsMenu, Scenario
+from grav_sim.src.menu.option_menu import OptionsMenu
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, replay_path: Optional[str] = None, solver: str = PhysicsConfig.FORCE_SOLVER):
         pygame.init()
-        self.entities = create_default_entities()
+        self.solver = solver
         self.timescale = PhysicsConfig.DEFAULT_TIME_SCALE
         self.screen = pygame.display.set_mode((WindowConfig.WIDTH, WindowConfig.HEIGHT))
         pygame.display.set_caption("Gravity Simulator")
 
-        self.physics = PhysicsEngine(self.entities)
+        self.pool = WorkerPool()
+        self.physics = self.create_engine(ScenarioConfig.DEFAULT)
         self.camera = Camera(entity_to_track=None)
         self.renderer = Renderer(camera=self.camera)
         self.mouse_handler = MouseHandler()
+        self.scheduler = FrameScheduler()
         self.keyboard_handler = KeyboardHandler(
             entities=self.physics.entities,
             camera=self.renderer.camera,
             time_scale=self.timescale,
+            max_time_scale=self.scheduler.max_time_scale,
         )
+        self.keyboard_handler.save_checkpoint = self.save_checkpoint
+        self.keyboard_handler.load_checkpoint = self.load_checkpoint
+        self.clock = pygame.time.Clock()
+        self.last_update = time.perf_counter()
+        self.simulation: Optional[SimulationThread] = None
+        # What is drawn: the engine's own entities, or views of the latest snapshot when physics is threaded
+        self.view_entities = self.physics.entities
+        self.view_particles = self.physics.particles
+        self.view_index = None
+        self.view_margin = 0.0
         self.running = False
         self.menu = OptionsMenu(self.set_scenario, self.start_game)
 
+        # A recorded run replaces the simulation entirely; the engine above is never stepped
+        self.replay = ReplayPlayer(replay_path) if replay_path else None
+        if self.replay is not None:
+            self.keyboard_handler.replay = self.replay
+            self.keyboard_handler.entities = self.replay.entities
 
-    def set_scenario(self, value, scenario):
-        self.physics = PhysicsEngine(Scenario[scenario].value)
 
+    def create_engine(self, scenario: str) -> PhysicsEngine:
+        engine = PhysicsEngine([], solver=self.solver, pool=self.pool)
+        engine.replace_particles(build_scenario(scenario))
+        return engine
+
+    def set_scenario(self, value, scenario):
+        self.physics = self.create_engine(scenario)
+        self.view_entities = self.physics.entities
+        self.view_particles = self.physics.particles
+        self.view_index = None
+        self.keyboard_handler.entities = self.physics.entities
+
+
+    def run_physics(self, command):
+        """Runs ``command(engine)`` where it is safe to mutate the engine and waits for the result."""
+        if self.simulation is not None:
+            return self.simulation.call(command)
+        return command(self.physics)
+
+    def save_checkpoint(self, path: str = CheckpointConfig.PATH) -> None:
+        if self.replay is None:
+            time_scale = self.keyboard_handler.time_scale
+            self.run_physics(lambda engine: save_checkpoint(path, engine, time_scale, self.camera))
+
+    def load_checkpoint(self, path: str = CheckpointConfig.PATH) -> None:
+        if self.replay is not None or not os.path.exists(path):
+            return
+        self.run_physics(lambda engine: engine.stop_recording())
+        self.physics, state = load_checkpoint(path, pool=self.pool, camera=self.camera)
+        if self.simulation is not None:
+            self.simulation.replace_engine(self.physics)
+            # The camera tracks the engine's entity; rebind it to the snapshot view of the same body
+            tracked = self.camera.entity_to_track
+            self.view_particles, self.view_entities = self.simulation.view()
+            self.camera.entity_to_track = self.view_entities.get(tracked.name) if tracked is not None else None
+        else:
+            self.view_particles, self.view_entities = self.physics.particles, self.physics.entities
+        self.view_index = None
+        self.keyboard_handler.entities = self.view_entities
+        if state["time_scale"] is not None:
+            self.keyboard_handler.time_scale = min(state["time_scale"], self.scheduler.max_time_scale)
+        self.renderer.text_cache.clear()
 
     def start_game(self):
         self.menu.disable()  # Disable the menu
         self.main_loop()  # Start the main game loop
 
     def menu_loop(self):
-        self.menu.mainloop(self.screen)
+        if self.replay is None:
+            self.menu.mainloop(self.screen)
         self.main_loop()
 
     def main_loop(self):
         self.running = True
+        if self.replay is None and SimulationConfig.THREADED:
+            self.simulation = SimulationThread(self.physics, self.keyboard_handler.time_scale)
+            self.simulation.start()
+        self.last_update = time.perf_counter()
         while self.running:
-            frame_start = pygame.time.get_ticks()
+            with profiler.span("frame"):
+                with profiler.span("input"):
+                    self.handle_input()
 
-            input_start = pygame.time.get_ticks()
-            self.handle_input()
-            input_time = pygame.time.get_ticks() - input_start
+                with profiler.span("update"):
+                    self.update()
 
-            update_start = pygame.time.get_ticks()
-            self.update()
-            update_time = pygame.time.get_ticks() - update_start
-
-            render_start = pygame.time.get_ticks()
-            self.render()
-            pygame.display.flip()
-            render_time = pygame.time.get_ticks() - render_start
-
-            total_frame_time = pygame.time.get_ticks() - frame_start
-
-            print(f"Frame timing (ms): Input: {input_time}, Update: {update_time}, Render: {render_time}, Total: {total_frame_time}")
+                with profiler.span("render"):
+                    self.render()
+                    pygame.display.flip()
 
+            # Caps the render rate; physics keeps its own pace through the scheduler
+            self.clock.tick(SimulationConfig.TARGET_FPS)
+            profiler.gauge("fps", self.clock.get_fps())
 
+        if self.simulation is not None:
+            self.simulation.stop()
+        self.pool.close()
         pygame.quit()
 
     def handle_input(self):
@@ -76,6 +148,11 @@ class Game:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 self.keyboard_handler.handle_keyboard_event(event)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                self.select_body(*pygame.mouse.get_pos())
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) and self.replay is not None:
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button in (4, 5):
+                    self.renderer.handle_zoom(event.button == 5)
             elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
                 x, y = pygame.mouse.get_pos()
                 button = event.button if event.type == pygame.MOUSEBUTTONDOWN else -1
@@ -88,15 +165,51 @@ class Game:
                     entity = self.mouse_handler.handle_click(x, y, button, self.renderer.camera)
                     if entity:
                         entity.draw_velocity = False
-                        self.physics.entities[entity.name] = entity
+                        self.run_physics(lambda engine: engine.add_entity(entity))
             elif event.type == pygame.MOUSEMOTION and self.mouse_handler.mouse_held:
                 x, y = pygame.mouse.get_pos()
                 self.mouse_handler.handle_click(x, y, 0, self.renderer.camera)
 
+    def select_body(self, x: int, y: int) -> None:
+        """Tracks the body under the cursor, or stops tracking if there is none."""
+        if self.replay is not None:
+            particles, entities, index = self.replay.particles, self.replay.entities, None
+        else:
+            particles, entities, index = self.view_particles, self.view_entities, self.view_index
+        particle_id = self.mouse_handler.pick(x, y, self.camera, particles, index)
+        self.camera.entity_to_track = None if particle_id is None else entities.get(particles.name_of(particle_id))
+
     def update(self):
-        self.physics.update(self.keyboard_handler.time_scale)
-        self.camera.update(self.physics.entities)
+        now = time.perf_counter()
+        elapsed = now - self.last_update
+        self.last_update = now
+        time_scale = self.keyboard_handler.time_scale
+        if self.replay is not None:
+            self.replay.advance(self.scheduler.simulated_rate(time_scale) * min(elapsed, 4 * self.scheduler.frame_time))
+            self.keyboard_handler.entities = self.replay.entities
+            self.camera.update(self.replay.entities)
+            return
+        if self.simulation is not None:
+            if self.simulation.error is not None:
+                raise self.simulation.error
+            self.simulation.time_scale = time_scale
+            self.view_particles, self.view_entities = self.simulation.view()
+            self.view_index, self.view_margin = self.simulation.view_index, self.simulation.view_margin
+            self.keyboard_handler.entities = self.view_entities
+        else:
+            steps = self.scheduler.steps_due(elapsed, time_scale)
+            for _ in range(steps):
+                self.physics.update(self.scheduler.timestep)
+            self.scheduler.record(steps, time.perf_counter() - now)
+            self.view_particles, self.view_entities = self.physics.particles, self.physics.entities
+            self.view_index, self.view_margin = self.physics.spatial_index(build=False), 0.0
+        self.camera.update(self.view_entities)
 
     def render(self):
-        self.renderer.draw(self.screen, list(self.physics.entities.values()), self.mouse_handler.creating_entity,
-                           self.keyboard_handler.time_scale)
+        if self.replay is not None:
+            self.renderer.draw(self.screen, self.replay.entities.existing(), self.mouse_handler.creating_entity,
+                               self.keyboard_handler.time_scale, self.replay.particles)
+            return
+        # Bodies come from the store; only views someone has created can ask for a velocity arrow
+        self.renderer.draw(self.screen, self.view_entities.existing(), self.mouse_handler.creating_entity,
+                           self.keyboard_handler.time_scale, self.view_particles, self.view_index, self.view_margin)
@@ -45,6 +45,10 @@ class Camera:
 
     def update(self, entities) -> None:
         if self.entity_to_track:
+            if self.entity_to_track.name not in entities:
+                # The tracked body was absorbed in a merge
+                self.entity_to_track = None
+                return
             self.entity_to_track = entities[self.entity_to_track.name]
             self.focus_on(self.entity_to_track.position.x, self.entity_to_track.position.y)
 
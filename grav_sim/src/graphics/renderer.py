@@ -1,10 +1,12 @@
 import pygame
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import math
+import numpy as np
 from pygame.math import Vector2
 
 from grav_sim.src.config.settings import WindowConfig, RendererConfig
 from grav_sim.src.core.entity.entity import Entity
+from grav_sim.src.core.profiler import profiler
 
 
 import pygame
@@ -43,18 +45,168 @@ def draw_perpendicular_lines(canvas, start, end, n, color):
 class Renderer:
     def __init__(self, camera):
         self.font = pygame.font.Font(None, 24)
+        self.hud_font = pygame.font.Font(None, 18)
         self.camera = camera
         self.overlay_surface = pygame.Surface((200, WindowConfig.HEIGHT), pygame.SRCALPHA)
         self.text_cache = {}
+        self.sprite_cache: Dict[Tuple[int, int, int, int], pygame.Surface] = {}
+        self._radius_cache = (None, None, 0.0)
 
-    def draw(self, canvas: pygame.Surface, entities: List[Entity], creating_entity: Optional[Entity], time_scale: float) -> None:
+    def draw(self, canvas: pygame.Surface, entities: List[Entity], creating_entity: Optional[Entity], time_scale: float,
+             particles=None, index=None, margin: float = 0.0) -> None:
+        """With ``particles`` the bodies are drawn from the store in one batch and ``entities`` only supply arrows.
+
+        ``index`` is an optional spatial index over the store's rows, positioned within ``margin`` of them;
+        with it only bodies near the view are looked at.
+        """
         canvas.fill((0, 0, 0))
 
         all_entities = entities + ([creating_entity] if creating_entity else [])
-        self._draw_entities(canvas, all_entities)
+        if particles is not None:
+            self._draw_particles(canvas, particles, index, margin)
+            if creating_entity:
+                self._draw_entities(canvas, [creating_entity])
+        else:
+            self._draw_entities(canvas, all_entities)
         self._draw_velocity_arrows(canvas, all_entities)
         self._draw_overlay(canvas, entities, creating_entity, time_scale)
 
+    def _draw_particles(self, canvas: pygame.Surface, particles, index=None, margin: float = 0.0) -> None:
+        if len(particles) == 0:
+            return
+        camera = self.camera
+        width, height = canvas.get_size()
+        rows = None
+        if index is not None and len(index.order) == len(particles):
+            # Bodies are drawn max(1, rint(2 * radius * zoom)) pixels across their centre, which never exceeds this
+            reach = margin + 2 * self._max_radius(particles) + 1 / camera.zoom_level
+            lower = camera.screen_to_world_pos(Vector2(0, 0))
+            upper = camera.screen_to_world_pos(Vector2(width, height))
+            lower = np.array([lower.x - reach, lower.y - reach])
+            upper = np.array([upper.x + reach, upper.y + reach])
+            # When the view holds most of the bodies a plain vectorized test beats walking the tree
+            body_lower, body_upper = index.bounds
+            covered = np.prod(np.clip(upper, body_lower, body_upper) - np.clip(lower, body_lower, body_upper))
+            if covered < RendererConfig.INDEX_MAX_COVERAGE * max(np.prod(body_upper - body_lower), 1e-300):
+                rows = index.query_box(lower, upper)
+        if rows is None:
+            rows = np.arange(len(particles))
+        center = np.array([camera.viewport.width / 2, camera.viewport.height / 2])
+        screen = (particles.positions[rows] - (camera.position.x, camera.position.y)) * camera.zoom_level + center
+        if (camera.zoom_level < RendererConfig.DENSITY_MAP_ZOOM and
+                len(particles) >= RendererConfig.DENSITY_MAP_MIN_BODIES):
+            self._draw_density_map(canvas, particles, rows, screen)
+            return
+        # Same rounding as Camera.world_to_screen_radius, for every body at once
+        radii = particles.masses[rows] / (particles.densities[rows] * math.pi)
+        radii = np.maximum(1, np.rint(np.sqrt(radii) * 2 * camera.zoom_level)).astype(np.int64)
+
+        visible = np.flatnonzero((screen[:, 0] + radii >= 0) & (screen[:, 0] - radii < width) &
+                                 (screen[:, 1] + radii >= 0) & (screen[:, 1] - radii < height))
+        rows, screen, radii = rows[visible], screen[visible], radii[visible]
+        profiler.gauge("bodies_drawn", len(rows))
+
+        if RendererConfig.SHOW_SWEPT_PATHS:
+            self._draw_swept_paths(canvas, particles, rows, screen, radii)
+
+        points = radii == 1
+        if points.any():
+            x = np.rint(screen[points, 0]).astype(np.int64)
+            y = np.rint(screen[points, 1]).astype(np.int64)
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            pixels = pygame.surfarray.pixels3d(canvas)
+            pixels[x[inside], y[inside]] = particles.colors[rows[points][inside]]
+            # The pixel view locks the surface until it is released
+            del pixels
+
+        large = radii > RendererConfig.SPRITE_MAX_RADIUS
+        for row, position, radius in zip(rows[large].tolist(), screen[large].tolist(), radii[large].tolist()):
+            pygame.draw.circle(canvas, particles.colors[row].tolist(), position, radius)
+        small = ~points & ~large
+        if small.any():
+            corners = np.rint(screen[small] - radii[small, None]).astype(np.int64).tolist()
+            keys = np.column_stack([particles.colors[rows[small]], radii[small]]).tolist()
+            canvas.blits([(self._sprite(*key), corner) for key, corner in zip(keys, corners)], doreturn=False)
+
+    def _max_radius(self, particles) -> float:
+        # Masses and densities are replaced, not edited, when rows change, so the arrays identify the result
+        masses, densities, radius = self._radius_cache
+        if masses is not particles.masses or densities is not particles.densities:
+            radius = float(particles.radii.max())
+            self._radius_cache = (particles.masses, particles.densities, radius)
+        return radius
+
+    def _draw_density_map(self, canvas: pygame.Surface, particles, candidates: np.ndarray, screen: np.ndarray) -> None:
+        """Bins mass into screen cells and draws it as one image, so cost follows pixels, not bodies.
+
+        Brightness is log-scaled mass and hue is the mass-weighted body colour of each cell.
+        """
+        cell = RendererConfig.DENSITY_MAP_CELL
+        width, height = canvas.get_size()
+        columns, rows = -(-width // cell), -(-height // cell)
+        x = np.floor(screen[:, 0] / cell).astype(np.int64)
+        y = np.floor(screen[:, 1] / cell).astype(np.int64)
+        inside = np.flatnonzero((x >= 0) & (x < columns) & (y >= 0) & (y < rows))
+        profiler.gauge("bodies_drawn", len(inside))
+        if len(inside) == 0:
+            return
+
+        cells = x[inside] * rows + y[inside]
+        bodies = candidates[inside]
+        masses = particles.masses[bodies]
+        mass = np.bincount(cells, weights=masses, minlength=columns * rows)
+        occupied = np.flatnonzero(mass)
+        # Scaled to a high percentile rather than the maximum, so one star does not leave the rest dark
+        brightness = np.log1p(mass[occupied] / np.median(masses))
+        brightness /= max(np.percentile(brightness, RendererConfig.DENSITY_MAP_PERCENTILE), 1e-12)
+        np.minimum(brightness, 1.0, out=brightness)
+        brightness *= 1 - RendererConfig.DENSITY_MAP_FLOOR
+        brightness += RendererConfig.DENSITY_MAP_FLOOR
+
+        colors = particles.colors[bodies]
+        shaded = np.empty((len(occupied), 3), dtype=np.uint8)
+        for channel in range(3):
+            weighted = np.bincount(cells, weights=masses * colors[:, channel], minlength=columns * rows)
+            shaded[:, channel] = np.minimum(weighted[occupied] / mass[occupied] * brightness, 255)
+
+        column, row = np.divmod(occupied, rows)
+        if cell == 1:
+            pixels = pygame.surfarray.pixels3d(canvas)
+            pixels[column, row] = shaded
+            del pixels
+            return
+        image = np.zeros((columns, rows, 3), dtype=np.uint8)
+        image[column, row] = shaded
+        surface = pygame.transform.scale(pygame.surfarray.make_surface(image), (columns * cell, rows * cell))
+        canvas.blit(surface, (0, 0))
+
+    def _sprite(self, red: int, green: int, blue: int, radius: int) -> pygame.Surface:
+        key = (red, green, blue, radius)
+        sprite = self.sprite_cache.get(key)
+        if sprite is None:
+            if len(self.sprite_cache) >= RendererConfig.SPRITE_CACHE_SIZE:
+                self.sprite_cache.clear()
+            # A colour key blits faster than per-pixel alpha; pick one that cannot be the body's colour
+            transparent = (0, 0, 0) if (red, green, blue) != (0, 0, 0) else (255, 0, 255)
+            sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+            sprite.fill(transparent)
+            pygame.draw.circle(sprite, (red, green, blue), (radius, radius), radius)
+            sprite.set_colorkey(transparent, pygame.RLEACCEL)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            self.sprite_cache[key] = sprite
+        return sprite
+
+    def _draw_swept_paths(self, canvas: pygame.Surface, particles, rows: np.ndarray, screen: np.ndarray,
+                          radii: np.ndarray) -> None:
+        camera = self.camera
+        center = np.array([camera.viewport.width / 2, camera.viewport.height / 2])
+        old_screen = (particles.old_positions[rows] - (camera.position.x, camera.position.y)) * camera.zoom_level + center
+        for row, old, new, radius in zip(rows.tolist(), old_screen.tolist(), screen.tolist(), radii.tolist()):
+            color = particles.colors[row].tolist()
+            pygame.draw.circle(canvas, color, old, radius, 1)
+            draw_perpendicular_lines(canvas, old, new, radius, color)
+
     def _draw_entities(self, canvas: pygame.Surface, entities: List[Entity]) -> None:
         for entity in entities:
             if entity.realRect.colliderect(self.camera.get_visible_area()):
@@ -62,7 +214,7 @@ class Renderer:
 
     def _draw_velocity_arrows(self, canvas: pygame.Surface, entities: List[Entity]) -> None:
         for entity in entities:
-            if entity.velocity > 0 and entity.draw_velocity:
+            if entity.draw_velocity and entity.velocity > 0:
                 screen_pos = self.camera.world_to_screen_pos(entity.position)
                 arrow_length = (RendererConfig.BASE_ARROW_LENGTH +
                               (entity.velocity * RendererConfig.VELOCITY_SCALE)) * self.camera.zoom_level
@@ -115,6 +267,24 @@ class Renderer:
 
         canvas.blit(self.overlay_surface, (0, 0))
 
+        if profiler.hud_visible:
+            self._draw_profiler_hud(canvas, line_height)
+
+    def _draw_profiler_hud(self, canvas: pygame.Surface, line_height: int) -> None:
+        # Rendered fresh every frame, so it bypasses the text cache
+        rows = [("phase", "p50", "p95", "max ms")]
+        for name, stats in sorted(profiler.summary().items()):
+            rows.append((name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['max']:.2f}"))
+        rows += [(f"{name}: {value}", "", "", "") for name, value in sorted(profiler.counters.items())]
+        rows += [(f"{name}: {value:.3g}", "", "", "") for name, value in sorted(profiler.gauges.items())]
+
+        columns = (10, 150, 210, 270)
+        y_offset = WindowConfig.HEIGHT - line_height * len(rows) - 10
+        for row in rows:
+            for x, cell in zip(columns, row):
+                canvas.blit(self.hud_font.render(cell, True, (0, 255, 0)), (x, y_offset))
+            y_offset += line_height
+
     def handle_zoom(self, zoom_in: bool) -> None:
         self.camera.zoom(zoom_in)
         self.text_cache.clear()
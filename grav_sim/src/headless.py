@@ -0,0 +1,199 @@
+"""Runs the simulation without a window, menu or event pump.
+
+    python -m grav_sim.src.headless RANDOM_GRAVITY --steps 1000 --stats-every 100
+    python -m grav_sim.src.headless bodies.json --time 5000 --snapshot-every 500 --snapshot-dir out
+
+Statistics and conservation samples are written as one JSON object per line, tagged by "kind"; snapshots are .npz files that can be loaded
+back as a scenario.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Optional, TextIO
+
+# Nothing here opens a window, but make sure a stray pygame call cannot reach for a display either
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from grav_sim.src.config.settings import DiagnosticsConfig, PhysicsConfig
+from grav_sim.src.core.checkpoint import MAGIC as CHECKPOINT_MAGIC, load_checkpoint, save_checkpoint
+from grav_sim.src.core.physics.integrators import INTEGRATORS
+from grav_sim.src.core.physics.physics import PhysicsEngine
+from grav_sim.src.core.physics.solvers import SOLVERS
+from grav_sim.src.core.physics.workers import WorkerPool
+from grav_sim.src.core.profiler import profiler
+from grav_sim.src.core.scenarios import SCENARIOS, build_scenario
+
+
+def is_checkpoint(path: str) -> bool:
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as file:
+        return file.read(len(CHECKPOINT_MAGIC)) == CHECKPOINT_MAGIC
+
+
+def load_scenario(engine: PhysicsEngine, path: str) -> None:
+    """Adds the bodies described by a .json list of bodies or a .npz snapshot to ``engine``."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            names = [str(name) or None for name in data["names"]] if "names" in data else None
+            engine.particles.extend(data["positions"], data["velocities"], data["masses"],
+                                    data["densities"], data["colors"], names)
+        return
+
+    with open(path) as file:
+        bodies = json.load(file)
+    engine.particles.extend(
+        positions=np.array([body["position"] for body in bodies], dtype=np.float64),
+        velocities=np.array([body.get("velocity", (0.0, 0.0)) for body in bodies], dtype=np.float64),
+        masses=np.array([body["mass"] for body in bodies], dtype=np.float64),
+        densities=np.array([body.get("density", 0.141) for body in bodies], dtype=np.float64),
+        colors=np.array([body.get("color", (255, 255, 255)) for body in bodies]),
+        names=[body.get("name") for body in bodies],
+    )
+
+
+def save_snapshot(engine: PhysicsEngine, path: str, step: int, sim_time: float) -> None:
+    particles = engine.particles
+    names = np.array([particles.names.get(particle_id, "") for particle_id in particles.ids.tolist()], dtype=str)
+    np.savez(path, positions=particles.positions, velocities=particles.velocities, masses=particles.masses,
+             densities=particles.densities, colors=particles.colors, ids=particles.ids, names=names,
+             step=step, time=sim_time)
+
+
+def statistics(engine: PhysicsEngine, step: int, sim_time: float, wall_time: float, steps_done: int) -> dict:
+    particles = engine.particles
+    momentum = (particles.masses[:, None] * particles.velocities).sum(axis=0)
+    kinetic = 0.5 * float((particles.masses * (particles.velocities ** 2).sum(axis=1)).sum())
+    return {
+        "kind": "stats",
+        "step": step,
+        "time": sim_time,
+        "bodies": len(particles),
+        "mass": float(particles.masses.sum()),
+        "kinetic_energy": kinetic,
+        "momentum": momentum.tolist(),
+        "force_evaluations": engine.force_evaluations,
+        "wall_time": wall_time,
+        "steps_per_second": steps_done / wall_time if wall_time > 0 else None,
+    }
+
+
+def run(engine: PhysicsEngine, time_scale: float, steps: Optional[int], duration: Optional[float],
+        stats_every: int, stats_out: TextIO, snapshot_every: int = 0, snapshot_dir: Optional[str] = None,
+        diagnostics_out: Optional[TextIO] = None, checkpoint: Optional[str] = None, checkpoint_every: int = 0) -> int:
+    """Advances ``engine`` until ``steps`` frames or ``duration`` simulated time have passed; returns the step count."""
+    step, sim_time = 0, 0.0
+    started = time.perf_counter()
+
+    def finished() -> bool:
+        if steps is not None and step >= steps:
+            return True
+        return duration is not None and sim_time >= duration
+
+    while not finished():
+        engine.update(time_scale)
+        step += 1
+        sim_time += time_scale
+        if stats_every and (step % stats_every == 0 or finished()):
+            # Reported against the engine's own clock, which keeps counting across resumed checkpoints
+            stats_out.write(json.dumps(statistics(engine, engine.steps, engine.time, time.perf_counter() - started,
+                                                  step)) + "\n")
+            stats_out.flush()
+        monitor = engine.diagnostics
+        if monitor is not None and monitor.samples and monitor.samples[-1]["step"] == engine.steps:
+            out = diagnostics_out or stats_out
+            out.write(json.dumps(dict(monitor.samples[-1], kind="diagnostics")) + "\n")
+            out.flush()
+        if snapshot_every and step % snapshot_every == 0:
+            save_snapshot(engine, os.path.join(snapshot_dir, f"snapshot_{engine.steps:08d}.npz"), engine.steps,
+                          engine.time)
+        if checkpoint and ((checkpoint_every and step % checkpoint_every == 0) or finished()):
+            save_checkpoint(checkpoint.format(step=engine.steps), engine, time_scale)
+    return step
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the gravity simulation headless.")
+    parser.add_argument("scenario", help=f"one of {', '.join(SCENARIOS)}, a .json / .npz file, or a checkpoint to resume")
+    length = parser.add_mutually_exclusive_group(required=True)
+    length.add_argument("--steps", type=int, help="number of frames to simulate")
+    length.add_argument("--time", type=float, help="amount of simulated time to cover")
+    parser.add_argument("--time-scale", type=float, default=PhysicsConfig.DEFAULT_TIME_SCALE)
+    parser.add_argument("--bodies", type=int, help="body count for generated scenarios (default: the scenario's own)")
+    parser.add_argument("--seed", type=int, help="seed for the scenario generators")
+    parser.add_argument("--solver", default=PhysicsConfig.FORCE_SOLVER, choices=sorted(SOLVERS),
+                        help="force solver; auto measures the others on the scenario and picks the fastest")
+    parser.add_argument("--integrator", default=PhysicsConfig.INTEGRATOR, choices=sorted(INTEGRATORS))
+    parser.add_argument("--substeps", type=int, default=PhysicsConfig.SUBSTEPS)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for force evaluation (0 = none)")
+    parser.add_argument("--stats-every", type=int, default=100, help="frames between statistics lines (0 = off)")
+    parser.add_argument("--stats-file", help="write statistics here instead of stdout")
+    parser.add_argument("--snapshot-every", type=int, default=0, help="frames between snapshots (0 = off)")
+    parser.add_argument("--snapshot-dir", default="snapshots")
+    parser.add_argument("--diagnostics-every", type=int, default=DiagnosticsConfig.INTERVAL,
+                        help="frames between conservation samples (0 = off)")
+    parser.add_argument("--diagnostics-file", help="write conservation samples here instead of the stats stream")
+    parser.add_argument("--record", help="write a binary trajectory of the run to this file")
+    parser.add_argument("--record-every", type=int, default=1, help="frames between recorded frames")
+    parser.add_argument("--checkpoint", help="save the full state here (may contain {step}) on a schedule and at the end")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="frames between checkpoints (0 = only at the end)")
+    parser.add_argument("--profile", help="write per-phase timing percentiles and counters here when done")
+    args = parser.parse_args(argv)
+    if args.scenario not in SCENARIOS and not os.path.isfile(args.scenario):
+        parser.error(f"unknown scenario or missing file: {args.scenario}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+
+    pool = WorkerPool(args.workers) if args.workers > 0 else None
+    stats_out = open(args.stats_file, "w") if args.stats_file else sys.stdout
+    diagnostics_out = open(args.diagnostics_file, "w") if args.diagnostics_file else None
+    engine = None
+    try:
+        if is_checkpoint(args.scenario):
+            # Resumes with the saved solver, integrator and random state; the command line does not override them
+            engine, _ = load_checkpoint(args.scenario, pool=pool)
+        else:
+            engine = PhysicsEngine([], solver=args.solver, pool=pool, integrator=args.integrator,
+                                   substeps=args.substeps, diagnostics_interval=args.diagnostics_every)
+            if args.scenario in SCENARIOS:
+                engine.replace_particles(build_scenario(args.scenario, args.bodies, args.seed))
+            else:
+                load_scenario(engine, args.scenario)
+        if args.record:
+            engine.start_recording(args.record, {"scenario": args.scenario, "time_scale": args.time_scale,
+                                                 "seed": args.seed}, args.record_every)
+        if args.snapshot_every:
+            os.makedirs(args.snapshot_dir, exist_ok=True)
+        run(engine, args.time_scale, args.steps, args.time, args.stats_every, stats_out,
+            args.snapshot_every, args.snapshot_dir, diagnostics_out, args.checkpoint, args.checkpoint_every)
+        if args.profile:
+            profiler.export(args.profile)
+    finally:
+        if engine is not None:
+            # Also on Ctrl+C, so an interrupted recording keeps every frame written so far
+            recorder = engine.stop_recording()
+            if recorder is not None:
+                print(f"Recorded {recorder.frames} frames to {recorder.path}: {recorder.dropped} dropped, "
+                      f"{recorder.overflowed} body positions without a slot", file=sys.stderr)
+        if stats_out is not sys.stdout:
+            stats_out.close()
+        if diagnostics_out is not None:
+            diagnostics_out.close()
+        if pool is not None:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,24 @@
+from itertools import islice
+
 import pygame
 
 from ..core.entity.entity import Entity
+from ..core.profiler import profiler
 from ..graphics.camera import Camera
 
 
 class KeyboardHandler:
-    def __init__(self, entities: list[Entity], camera: Camera, time_scale: float) -> None:
+    def __init__(self, entities: list[Entity], camera: Camera, time_scale: float,
+                 max_time_scale: float = 1000.0) -> None:
         self.time_scale: float = time_scale
+        # Past this the scheduler cannot run more steps, so a faster setting would only mislabel the rate
+        self.max_time_scale: float = max_time_scale
         self.entities: list[Entity] = entities
         self.camera: Camera = camera
+        self.replay = None
+        # Set by the game, which owns the engine these act on
+        self.save_checkpoint = None
+        self.load_checkpoint = None
 
     def handle_keyboard_event(self, event: pygame.event.Event) -> None:
         if event.type == pygame.KEYDOWN:
@@ -19,15 +29,33 @@ class KeyboardHandler:
             pygame.K_PERIOD: self._increase_time_scale,
             pygame.K_COMMA: self._decrease_time_scale,
             pygame.K_SPACE: self._pause_game,
+            pygame.K_F3: self._toggle_profiler_hud,
+            pygame.K_F4: self._export_profile,
+            pygame.K_F5: lambda: self.save_checkpoint and self.save_checkpoint(),
+            pygame.K_F9: lambda: self.load_checkpoint and self.load_checkpoint(),
         }
 
-        if key in actions:
+        if self.replay is not None and key in self._replay_actions():
+            self._replay_actions()[key]()
+        elif key in actions:
             actions[key]()
         elif pygame.K_1 <= key <= pygame.K_9:
             self._track_entity(key)
 
+    def _replay_actions(self) -> dict:
+        # Scrubbing: arrows step one frame (ten with shift), Home/End jump to the ends
+        stride = 10 if pygame.key.get_mods() & pygame.KMOD_SHIFT else 1
+        return {
+            pygame.K_SPACE: self.replay.toggle_playing,
+            pygame.K_LEFT: lambda: self.replay.step(-stride),
+            pygame.K_RIGHT: lambda: self.replay.step(stride),
+            pygame.K_HOME: lambda: self.replay.seek(0),
+            pygame.K_END: lambda: self.replay.seek(len(self.replay) - 1),
+            pygame.K_i: self.replay.toggle_interpolation,
+        }
+
     def _increase_time_scale(self) -> None:
-        self.time_scale = min(self.time_scale * 2, 1000.0)
+        self.time_scale = min(self.time_scale * 2, self.max_time_scale)
 
     def _decrease_time_scale(self) -> None:
         self.time_scale = max(self.time_scale / 2, 0.25)
@@ -35,9 +63,14 @@ class KeyboardHandler:
     def _pause_game(self) -> None:
         self.time_scale = 0.0
 
+    def _toggle_profiler_hud(self) -> None:
+        profiler.hud_visible = not profiler.hud_visible
+
+    def _export_profile(self) -> None:
+        profiler.export()
+
     def _track_entity(self, key: int) -> None:
-        entity_keys = list(self.entities.keys())
-        index = key - pygame.K_1
-        if 0 <= index < len(entity_keys):
-            entity_key = entity_keys[index]
-            self.camera.entity_to_track = self.entities[entity_key]
+        # Only walks as far as the requested position instead of listing every entity
+        entity = next(islice(self.entities.values(), key - pygame.K_1, None), None)
+        if entity is not None:
+            self.camera.entity_to_track = entity
@@ -2,8 +2,9 @@ import math
 from typing import Optional
 from pygame.math import Vector2
 
-from grav_sim.src.config.settings import EntityConfig
+from grav_sim.src.config.settings import EntityConfig, MouseConfig
 from grav_sim.src.core.entity.entity import Entity
+from grav_sim.src.core.physics.tree import FlatQuadTree
 from grav_sim.src.graphics.camera import Camera
 
 
@@ -44,3 +45,20 @@ class MouseHandler:
             return result
 
         return None
+
+    def pick(self, mouse_x: int, mouse_y: int, camera: Camera, particles, index=None) -> Optional[int]:
+        """Id of the body nearest the cursor if the cursor is on it or within PICK_RADIUS pixels of its edge.
+
+        ``index`` is a spatial index over ``particles``' rows; without one a tree is built for this query.
+        """
+        if len(particles) == 0:
+            return None
+        world_pos = camera.screen_to_world_pos(Vector2(mouse_x, mouse_y))
+        if index is None:
+            index = FlatQuadTree.build(particles.positions, particles.masses)
+        row = int(index.nearest((world_pos.x, world_pos.y))[0])
+        distance = math.hypot(*(particles.positions[row] - (world_pos.x, world_pos.y)))
+        radius = math.sqrt(particles.masses[row] / (particles.densities[row] * math.pi))
+        if distance > radius + MouseConfig.PICK_RADIUS / camera.zoom_level:
+            return None
+        return int(particles.ids[row])
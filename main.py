@@ -1,8 +1,17 @@
+import argparse
+
+from grav_sim.src.config.settings import PhysicsConfig
+from grav_sim.src.core.physics.solvers import SOLVERS
 from grav_sim.src.game import Game
 
 
 def main():
-    game = Game()
+    parser = argparse.ArgumentParser(description="Gravity simulator")
+    parser.add_argument("--replay", help="play back a trajectory recorded with --record instead of simulating")
+    parser.add_argument("--solver", default=PhysicsConfig.FORCE_SOLVER, choices=sorted(SOLVERS),
+                        help="force solver; auto measures the others on the scenario and picks the fastest")
+    args = parser.parse_args()
+    game = Game(replay_path=args.replay, solver=args.solver)
     game.menu_loop()
 
 if __name__ == "__main__":